@@ -2,8 +2,11 @@
 
 import reflex as rx
 
+from .api import api
 from .background.background import page_shell
 from .components.cards import all_cards
+from .data.connection import warmup
+from .data.weather import weather_client_lifespan
 from .state import RouteState
 
 
@@ -24,6 +27,16 @@ def index() -> rx.Component:
 app = rx.App(
     theme=rx.theme(
         appearance="dark", has_background=True, panel_background="translucent"
-    )
+    ),
+    # extra http routes (/metrics) served alongside the app, see api.py
+    api_transformer=api,
+)
+app.add_page(
+    index,
+    on_load=[RouteState.on_page_load, RouteState.load_leaderboard],
 )
-app.add_page(index, on_load=RouteState.on_page_load)
+
+# open the duckdb connection + register the dataset views once when the worker starts
+app.register_lifespan_task(warmup)
+# close the shared METAR http client on shutdown
+app.register_lifespan_task(weather_client_lifespan)
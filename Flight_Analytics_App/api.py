@@ -0,0 +1,239 @@
+# plain http routes next to the reflex app (reflex mounts its own routes behind this one, see api_transformer)
+#   GET  /metrics                -> prometheus text format (metrics.py)
+#   GET  /api/route_stats        -> one route: the pie chart counts, arrival delay percentiles / histogram and
+#                                   the per airline breakdown
+#   POST /api/route_stats/batch  -> stats for many routes in one grouped query, streamed back as json lines
+#   GET  /api/leaderboard        -> best / worst routes by on time, delay, cancellation or diversion rate
+#   GET  /api/airport_routes     -> every route out of / into one airport, sorted and paged
+#   GET  /api/airports/suggest   -> airport autocomplete (codes, ICAO ids, names), busiest first
+
+import json
+import os
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from .data.airport_list import AIRPORT_CODE_SET
+from .data.airport_routes import AIRPORT_PAGE_SIZE, airport_routes
+from .data.airport_search import SUGGEST_LIMIT, SUGGEST_MAX_LIMIT, suggest_airports
+from .data.connection import get_db
+from .data.database import batch_route_stats, route_carriers, route_delays, route_stats
+from .data.leaderboard import LEADERBOARD_SIZE, leaderboard
+from .executor import run_blocking
+from .metrics import render_metrics, span
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# per request limits for the batch endpoint (ROUTE_BATCH_MAX_PAIRS / ROUTE_BATCH_MAX_BYTES env vars)
+BATCH_MAX_PAIRS = int(os.environ.get("ROUTE_BATCH_MAX_PAIRS", 1000))
+BATCH_MAX_BYTES = int(os.environ.get("ROUTE_BATCH_MAX_BYTES", 256 * 1024))
+# longest horizon accepted in months (0 = MAX, the whole dataset)
+BATCH_MAX_MONTHS = 600
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def _error(status: int, message: str) -> JSONResponse:
+    return JSONResponse({"error": message}, status_code=status)
+
+
+async def _read_body(request: Request) -> bytes | None:
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > BATCH_MAX_BYTES:
+        return None
+    body = b""
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > BATCH_MAX_BYTES:
+            return None
+    return body
+
+
+# same rules as the analyze button: known IATA code from the airport list, origin != destination
+def _pair_error(origin: str, dest: str) -> str | None:
+    if origin not in AIRPORT_CODE_SET:
+        return f"unknown origin airport code {origin!r}"
+    if dest not in AIRPORT_CODE_SET:
+        return f"unknown destination airport code {dest!r}"
+    if origin == dest:
+        return "origin and destination cannot be the same"
+    return None
+
+
+# /api/route_stats?origin=LAX&dest=JFK&months=12
+#   months: horizon like the batch endpoint (0 = MAX), defaults to 3
+# -> {"origin", "dest", "months", "scheduled", "on_time", ..., "on_time_per", ...,
+#     "delays": {"available", "flights", "p50", "p90", "p99", "buckets": [{"name", "flights"}, ...]},
+#     "carriers": [{"carrier": "WN", "name": "Southwest Airlines", "scheduled", ..., "on_time_per", ...}, ...]}
+async def route_stats_endpoint(request: Request) -> JSONResponse:
+    params = request.query_params
+    origin = params.get("origin", "").upper().strip()
+    dest = params.get("dest", "").upper().strip()
+    try:
+        months = int(params.get("months", 3))
+    except ValueError:
+        return _error(400, "months must be an integer")
+    if not 0 <= months <= BATCH_MAX_MONTHS:
+        return _error(400, f"months must be between 0 (MAX) and {BATCH_MAX_MONTHS}")
+    error = _pair_error(origin, dest)
+    if error is not None:
+        return _error(400, error)
+
+    stats = await run_blocking(route_stats, get_db(), str(months), origin, dest)
+    delays = await run_blocking(route_delays, get_db(), str(months), origin, dest)
+    carriers = await run_blocking(route_carriers, get_db(), str(months), origin, dest)
+    return JSONResponse(
+        {"origin": origin, "dest": dest, "months": months, **stats, "delays": delays, "carriers": carriers}
+    )
+
+
+# request:  {"months": 3, "routes": [["LAX", "JFK"], ["ONT", "DFW"], ...]}
+#           months is a horizon preset like the UI's (1, 3, 6, 12, 24, 0 = MAX), defaults to 3
+# response: one json object per line, in request order
+#           {"origin": "LAX", "dest": "JFK", "months": 3, "scheduled": ..., "on_time": ..., "on_time_per": ..., ...}
+#           pairs that fail validation get {"origin": ..., "dest": ..., "error": "..."} instead
+async def batch_route_stats_endpoint(request: Request):
+    body = await _read_body(request)
+    if body is None:
+        return _error(413, f"request body is larger than {BATCH_MAX_BYTES} bytes")
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return _error(400, "request body must be json")
+    if not isinstance(payload, dict):
+        return _error(400, "request body must be a json object")
+
+    months = payload.get("months", 3)
+    if isinstance(months, bool) or not isinstance(months, int) or not 0 <= months <= BATCH_MAX_MONTHS:
+        return _error(400, f"months must be an integer between 0 (MAX) and {BATCH_MAX_MONTHS}")
+
+    routes = payload.get("routes")
+    if not isinstance(routes, list) or not routes:
+        return _error(400, "routes must be a non-empty list of [origin, dest] pairs")
+    if len(routes) > BATCH_MAX_PAIRS:
+        return _error(413, f"at most {BATCH_MAX_PAIRS} routes per request")
+
+    pairs = []
+    for route in routes:
+        if (
+            not isinstance(route, list)
+            or len(route) != 2
+            or not all(isinstance(code, str) for code in route)
+        ):
+            return _error(400, "every route must be an [origin, dest] pair of airport codes")
+        pairs.append((route[0].upper().strip(), route[1].upper().strip()))
+
+    errors = {pair: _pair_error(*pair) for pair in pairs}
+    valid = [pair for pair in pairs if errors[pair] is None]
+
+    with span("batch_route_stats"):
+        stats = await run_blocking(batch_route_stats, get_db(), str(months), valid) if valid else {}
+
+    async def lines():
+        for origin, dest in pairs:
+            error = errors[(origin, dest)]
+            if error is not None:
+                row = {"origin": origin, "dest": dest, "error": error}
+            else:
+                row = {"origin": origin, "dest": dest, "months": months, **stats[(origin, dest)]}
+            yield json.dumps(row) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+# /api/leaderboard?months=12&metric=cancelled&order=highest&limit=10
+#   months: horizon preset (1, 3, 6, 12, 24, 0 = MAX), metric: on_time | delayed | cancelled | diverted,
+#   order: highest | lowest (rate first), limit: up to LEADERBOARD_SIZE routes
+async def leaderboard_endpoint(request: Request) -> JSONResponse:
+    params = request.query_params
+    try:
+        months = int(params.get("months", 12))
+        limit = int(params.get("limit", LEADERBOARD_SIZE))
+    except ValueError:
+        return _error(400, "months and limit must be integers")
+    if not 1 <= limit <= LEADERBOARD_SIZE:
+        return _error(400, f"limit must be between 1 and {LEADERBOARD_SIZE}")
+
+    try:
+        board = await run_blocking(
+            leaderboard,
+            get_db(),
+            months,
+            params.get("metric", "on_time"),
+            params.get("order", "highest"),
+            limit,
+        )
+    except ValueError as e:
+        return _error(400, str(e))
+    return JSONResponse(board)
+
+
+# /api/airport_routes?airport=ATL&months=12&direction=outbound&sort=scheduled&order=desc&page=1&page_size=20
+#   direction: outbound | inbound, sort: scheduled | on_time_per | delayed_per | cancelled_per | diverted_per |
+#   partner (the airport at the other end), order: desc | asc
+# -> {airport, months, start, end, direction, sort, descending, page, page_size, pages, total_routes, total_flights,
+#     routes: [{"origin", "dest", "partner", "scheduled", ..., "on_time_per", ...}, ...]}
+async def airport_routes_endpoint(request: Request) -> JSONResponse:
+    params = request.query_params
+    airport = params.get("airport", "").upper().strip()
+    if airport not in AIRPORT_CODE_SET:
+        return _error(400, f"unknown airport code {airport!r}")
+    try:
+        months = int(params.get("months", 3))
+        page = int(params.get("page", 1))
+        page_size = int(params.get("page_size", AIRPORT_PAGE_SIZE))
+    except ValueError:
+        return _error(400, "months, page and page_size must be integers")
+    if not 0 <= months <= BATCH_MAX_MONTHS:
+        return _error(400, f"months must be between 0 (MAX) and {BATCH_MAX_MONTHS}")
+    order = params.get("order", "desc")
+    if order not in ("asc", "desc"):
+        return _error(400, "order must be asc or desc")
+
+    try:
+        result = await run_blocking(
+            airport_routes,
+            get_db(),
+            airport,
+            str(months),
+            params.get("direction", "outbound"),
+            params.get("sort", "scheduled"),
+            order == "desc",
+            page,
+            page_size,
+        )
+    except ValueError as e:
+        return _error(400, str(e))
+    return JSONResponse(result)
+
+
+# /api/airports/suggest?q=dallas&limit=8
+# -> {"query", "airports": [{"code", "label", "icao", "name", "region", "flights"}, ...]} best match first
+async def airport_suggest_endpoint(request: Request) -> JSONResponse:
+    params = request.query_params
+    query = params.get("q", "")
+    try:
+        limit = int(params.get("limit", SUGGEST_LIMIT))
+    except ValueError:
+        return _error(400, "limit must be an integer")
+    if not 1 <= limit <= SUGGEST_MAX_LIMIT:
+        return _error(400, f"limit must be between 1 and {SUGGEST_MAX_LIMIT}")
+    airports = suggest_airports(query[:100], limit)  # in memory, no query
+    return JSONResponse({"query": query, "airports": airports})
+
+
+api = Starlette(
+    routes=[
+        Route("/metrics", metrics_endpoint, methods=["GET"]),
+        Route("/api/route_stats", route_stats_endpoint, methods=["GET"]),
+        Route("/api/route_stats/batch", batch_route_stats_endpoint, methods=["POST"]),
+        Route("/api/leaderboard", leaderboard_endpoint, methods=["GET"]),
+        Route("/api/airport_routes", airport_routes_endpoint, methods=["GET"]),
+        Route("/api/airports/suggest", airport_suggest_endpoint, methods=["GET"]),
+    ]
+)
@@ -1,6 +1,5 @@
 import reflex as rx
 
-from ..data.airport_list import airport_datalist
 from .particles import particles_background
 
 
@@ -10,7 +9,6 @@ def page_shell(*children: rx.Component) -> rx.Component:
     return rx.box(
         particles_background(),
         rx.box(
-            airport_datalist(),  # add this once
             *children,
             position="relative",
             z_index="0",
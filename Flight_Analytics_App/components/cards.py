@@ -1,6 +1,6 @@
 import reflex as rx
 
-from ..data.airport_list import AIRPORT_DATALIST_ID
+from ..data.metadata import HORIZON_PRESETS
 from ..state import RouteState
 
 from .gradients import delayed_gradient_border_card, gradient_border_card
@@ -94,6 +94,8 @@ def all_cards() -> rx.Component:
         ),
         airports_card(),
         time_horizon_card(),
+        airport_routes_card(),
+        leaderboard_card(),
         # new weather cards
         width="100%",
         max_width="72rem",
@@ -106,15 +108,50 @@ def all_cards() -> rx.Component:
     )
 
 
-HORIZON_PRESETS = [
-    (1, "1M"),
-    (3, "3M"),
-    (6, "6M"),
-    (12, "1Y"),
-    (24, "2Y"),
-    # have had to hardcode 90 here as the extent of the dataset
-    (90, "MAX"),
-]
+# airport input + its suggestion list (ranked server side, data/airport_search.py)
+# debounced so the suggest event fires once the user pauses typing, not on every key
+def airport_input(placeholder, value, on_change, suggestions, on_pick) -> rx.Component:
+    return rx.box(
+        rx.debounce_input(
+            rx.input(
+                placeholder=placeholder,
+                value=value,
+                on_change=on_change,
+                width="100%",
+                height="3rem",
+                font_size="1.1rem",
+                auto_complete=False,
+            ),
+            debounce_timeout=250,
+        ),
+        rx.cond(
+            suggestions.length() > 0,
+            rx.card(
+                rx.vstack(
+                    rx.foreach(
+                        suggestions,
+                        lambda s: rx.button(
+                            s["label"],
+                            on_click=on_pick(s["code"]),
+                            variant="ghost",
+                            width="100%",
+                            justify="start",
+                        ),
+                    ),
+                    spacing="1",
+                    width="100%",
+                ),
+                position="absolute",
+                top="3.25rem",
+                width="100%",
+                z_index="10",
+                max_height="20rem",
+                overflow_y="auto",
+            ),
+        ),
+        position="relative",
+        width="100%",
+    )
 
 
 # function to draw the airport card
@@ -128,16 +165,12 @@ def airports_card() -> rx.Component:
                 justify="between",
                 align="center",
             ),
-            rx.input(
-                placeholder="e.g., ONT",
-                value=RouteState.source_airport,
-                on_change=RouteState.set_source_airport,
-                width="100%",
-                height="3rem",
-                font_size="1.1rem",
-                max_length=3,
-                pattern="[A-Za-z]{3}",
-                list=AIRPORT_DATALIST_ID,
+            airport_input(
+                "e.g., ONT or Ontario",
+                RouteState.source_query,
+                RouteState.set_source_query,
+                RouteState.source_suggestions,
+                RouteState.pick_source,
             ),
             rx.box(height="0.75rem"),
             rx.hstack(
@@ -147,16 +180,12 @@ def airports_card() -> rx.Component:
                 justify="between",
                 align="center",
             ),
-            rx.input(
-                placeholder="e.g., DFW",
-                value=RouteState.dest_airport,
-                on_change=RouteState.set_dest_airport,
-                width="100%",
-                height="3rem",
-                font_size="1.1rem",
-                max_length=3,
-                pattern="[A-Za-z]{3}",
-                list=AIRPORT_DATALIST_ID,
+            airport_input(
+                "e.g., DFW or Dallas",
+                RouteState.dest_query,
+                RouteState.set_dest_query,
+                RouteState.dest_suggestions,
+                RouteState.pick_dest,
             ),
             rx.cond(
                 # we can literally use the same pi chart flag for the network graph
@@ -226,6 +255,80 @@ def airports_card() -> rx.Component:
     )
 
 
+# monthly flights of the analyzed route stacked by outcome (same colors as the pie)
+def trend_chart() -> rx.Component:
+    return rx.recharts.area_chart(
+        *[
+            rx.recharts.area(
+                data_key=key,
+                name=name,
+                stack_id="flights",
+                type_="monotone",
+                stroke=color,
+                fill=color,
+            )
+            for key, name, color in [
+                ("on_time", "On Time/Schedule", "#9B5DE5"),
+                ("delayed", "Delayed", "#F15BB5"),
+                ("cancelled", "Cancelled", "#FEE440"),
+                ("diverted", "Diverted", "#00BBF9"),
+            ]
+        ],
+        rx.recharts.x_axis(data_key="month"),
+        rx.recharts.y_axis(),
+        rx.recharts.graphing_tooltip(),
+        rx.recharts.legend(),
+        data=RouteState.trend_data,
+        width="100%",
+        height=300,
+    )
+
+
+# stacked bar per airline with the same categories / colors as the pie
+def carrier_chart() -> rx.Component:
+    return rx.recharts.bar_chart(
+        *[
+            rx.recharts.bar(data_key=key, name=name, stack_id="flights", fill=color)
+            for key, name, color in [
+                ("on_time", "On Time/Schedule", "#9B5DE5"),
+                ("delayed", "Delayed", "#F15BB5"),
+                ("cancelled", "Cancelled", "#FEE440"),
+                ("diverted", "Diverted", "#00BBF9"),
+            ]
+        ],
+        rx.recharts.x_axis(data_key="carrier"),
+        rx.recharts.y_axis(),
+        rx.recharts.graphing_tooltip(),
+        rx.recharts.legend(),
+        data=RouteState.carrier_data,
+        width="100%",
+        height=300,
+    )
+
+
+# flights per arrival delay bucket + the percentiles (analyze fills both)
+def delay_chart() -> rx.Component:
+    return rx.vstack(
+        rx.recharts.bar_chart(
+            rx.recharts.bar(data_key="flights", name="Flights", fill="#F15BB5"),
+            rx.recharts.x_axis(data_key="name"),
+            rx.recharts.y_axis(),
+            rx.recharts.graphing_tooltip(),
+            data=RouteState.delay_data,
+            width="100%",
+            height=270,
+        ),
+        rx.text(
+            RouteState.delay_percentiles,
+            size="2",
+            color_scheme="gray",
+            text_align="center",
+        ),
+        width="100%",
+        align="stretch",
+    )
+
+
 # function to draw the time horizon card
 def time_horizon_card() -> rx.Component:
     return gradient_border_card(
@@ -257,6 +360,14 @@ def time_horizon_card() -> rx.Component:
                 flex_wrap="wrap",
                 justify="center",
             ),
+            # real extent of the dataset (read from the parquet metadata on page load)
+            rx.text(
+                "Data available: ",
+                RouteState.dataset_range,
+                size="2",
+                color_scheme="gray",
+                text_align="center",
+            ),
             # analyze button
             rx.box(height="1rem"),
             rx.button(
@@ -273,20 +384,40 @@ def time_horizon_card() -> rx.Component:
             rx.cond(
                 # we make below variable available to the method? -> might be unnecessary
                 RouteState.show_pie_flag,  # wont run while false. the analyze button makes it true in the last line after validating inputs then we can run the rendering function
-                rx.recharts.pie_chart(
-                    rx.recharts.pie(
-                        data=RouteState.pie_data,
-                        outer_radius="73%",  # adhoc tweak
-                        data_key="value",
-                        stroke="transparent",  # removes the black borders
-                        name_key="name",
-                        label=True,
-                        padding_angle=5,
-                        label_line=False,
+                rx.vstack(
+                    # whole horizon (pie), month by month (trend), arrival delays or per airline, all filled by the same analyze click
+                    rx.segmented_control.root(
+                        rx.segmented_control.item("Summary", value="pie"),
+                        rx.segmented_control.item("Monthly trend", value="trend"),
+                        rx.segmented_control.item("Arrival delays", value="delays"),
+                        rx.segmented_control.item("By airline", value="carriers"),
+                        value=RouteState.chart_mode,
+                        on_change=RouteState.set_chart_mode,
+                        width="100%",
+                    ),
+                    rx.match(
+                        RouteState.chart_mode,
+                        ("trend", trend_chart()),
+                        ("delays", delay_chart()),
+                        ("carriers", carrier_chart()),
+                        rx.recharts.pie_chart(
+                            rx.recharts.pie(
+                                data=RouteState.pie_data,
+                                outer_radius="73%",  # adhoc tweak
+                                data_key="value",
+                                stroke="transparent",  # removes the black borders
+                                name_key="name",
+                                label=True,
+                                padding_angle=5,
+                                label_line=False,
+                            ),
+                            rx.recharts.legend(),
+                            width="100%",
+                            height=300,
+                        ),
                     ),
-                    rx.recharts.legend(),
                     width="100%",
-                    height=300,
+                    align="stretch",
                 ),
             ),
             spacing="3",
@@ -294,3 +425,209 @@ def time_horizon_card() -> rx.Component:
         ),
         width=rx.breakpoints(initial="100%", md="calc(50% - 0.5rem)"),
     )
+
+
+LEADERBOARD_METRIC_LABELS = [
+    ("on_time", "On time"),
+    ("delayed", "Delayed"),
+    ("cancelled", "Cancelled"),
+    ("diverted", "Diverted"),
+]
+
+
+# nationwide route leaderboard (precomputed per dataset version, see data/leaderboard.py)
+def leaderboard_card() -> rx.Component:
+    return gradient_border_card(
+        rx.vstack(
+            rx.hstack(
+                rx.heading("Route Leaderboard", size="6"),
+                rx.icon(tag="trophy"),
+                width="100%",
+                justify="between",
+                align="center",
+            ),
+            rx.flex(
+                rx.select.root(
+                    rx.select.trigger(),
+                    rx.select.content(
+                        *[
+                            rx.select.item(label, value=metric)
+                            for metric, label in LEADERBOARD_METRIC_LABELS
+                        ]
+                    ),
+                    value=RouteState.leaderboard_metric,
+                    on_change=RouteState.set_leaderboard_metric,
+                ),
+                rx.select.root(
+                    rx.select.trigger(),
+                    rx.select.content(
+                        rx.select.item("Highest rate first", value="highest"),
+                        rx.select.item("Lowest rate first", value="lowest"),
+                    ),
+                    value=RouteState.leaderboard_order,
+                    on_change=RouteState.set_leaderboard_order,
+                ),
+                *[
+                    rx.button(
+                        label,
+                        on_click=RouteState.set_leaderboard_months(months),
+                        variant=rx.cond(
+                            RouteState.leaderboard_months == months,
+                            "solid",
+                            "outline",
+                        ),
+                        border_radius="9999px",
+                        padding_x="1.1rem",
+                    )
+                    for months, label in HORIZON_PRESETS
+                ],
+                gap="0.75rem",
+                flex_wrap="wrap",
+                justify="center",
+                align="center",
+            ),
+            rx.text(
+                RouteState.leaderboard_ranked_routes,
+                " routes with at least ",
+                RouteState.leaderboard_min_flights,
+                " scheduled flights in this horizon",
+                size="2",
+                color_scheme="gray",
+                text_align="center",
+            ),
+            rx.cond(
+                RouteState.leaderboard_loading,
+                rx.center(rx.spinner(size="3"), width="100%"),
+                rx.table.root(
+                    rx.table.header(
+                        rx.table.row(
+                            rx.table.column_header_cell("#"),
+                            rx.table.column_header_cell("Route"),
+                            rx.table.column_header_cell("Flights"),
+                            rx.table.column_header_cell("Rate"),
+                        ),
+                    ),
+                    rx.table.body(
+                        rx.foreach(
+                            RouteState.leaderboard_rows,
+                            lambda row: rx.table.row(
+                                rx.table.cell(row["rank"]),
+                                rx.table.cell(row["route"]),
+                                rx.table.cell(row["scheduled"]),
+                                rx.table.cell(row["rate"]),
+                            ),
+                        ),
+                    ),
+                    width="100%",
+                ),
+            ),
+            spacing="3",
+            align="stretch",
+        ),
+        width="100%",
+    )
+
+
+# table columns of the airport card: (header, RouteState.airport_rows key, airport_routes sort key)
+AIRPORT_COLUMNS = [
+    ("Route", "route", "partner"),
+    ("Flights", "scheduled", "scheduled"),
+    ("On time", "on_time", "on_time_per"),
+    ("Delayed", "delayed", "delayed_per"),
+    ("Cancelled", "cancelled", "cancelled_per"),
+]
+
+
+def _sort_header(label: str, sort: str) -> rx.Component:
+    return rx.table.column_header_cell(
+        rx.button(
+            label,
+            rx.cond(
+                RouteState.airport_sort == sort,
+                rx.cond(
+                    RouteState.airport_descending,
+                    rx.icon(tag="arrow_down", size=14),
+                    rx.icon(tag="arrow_up", size=14),
+                ),
+                rx.fragment(),
+            ),
+            variant="ghost",
+            on_click=RouteState.set_airport_sort(sort),
+        )
+    )
+
+
+# airport mode: every route out of / into the origin airport (analyze with no destination)
+# one page at a time, sorting and paging happen on the server
+def airport_routes_card() -> rx.Component:
+    return rx.cond(
+        RouteState.airport != "",
+        gradient_border_card(
+            rx.vstack(
+                rx.hstack(
+                    rx.heading("Routes at ", RouteState.airport, size="6"),
+                    rx.icon(tag="tower_control"),
+                    width="100%",
+                    justify="between",
+                    align="center",
+                ),
+                rx.segmented_control.root(
+                    rx.segmented_control.item("Outbound", value="outbound"),
+                    rx.segmented_control.item("Inbound", value="inbound"),
+                    value=RouteState.airport_direction,
+                    on_change=RouteState.set_airport_direction,
+                    width="100%",
+                ),
+                rx.text(
+                    RouteState.airport_total_routes,
+                    " routes, ",
+                    RouteState.airport_total_flights,
+                    " scheduled flights in this horizon",
+                    size="2",
+                    color_scheme="gray",
+                    text_align="center",
+                ),
+                rx.cond(
+                    RouteState.airport_loading,
+                    rx.center(rx.spinner(size="3"), width="100%"),
+                    rx.table.root(
+                        rx.table.header(
+                            rx.table.row(
+                                *[_sort_header(label, sort) for label, _, sort in AIRPORT_COLUMNS]
+                            ),
+                        ),
+                        rx.table.body(
+                            rx.foreach(
+                                RouteState.airport_rows,
+                                lambda row: rx.table.row(
+                                    *[rx.table.cell(row[key]) for _, key, _ in AIRPORT_COLUMNS]
+                                ),
+                            ),
+                        ),
+                        width="100%",
+                    ),
+                ),
+                rx.hstack(
+                    rx.button(
+                        rx.icon(tag="chevron_left"),
+                        on_click=RouteState.prev_airport_page,
+                        disabled=RouteState.airport_page <= 1,
+                        variant="soft",
+                    ),
+                    rx.text("Page ", RouteState.airport_page, " of ", RouteState.airport_pages, size="2"),
+                    rx.button(
+                        rx.icon(tag="chevron_right"),
+                        on_click=RouteState.next_airport_page,
+                        disabled=RouteState.airport_page >= RouteState.airport_pages,
+                        variant="soft",
+                    ),
+                    width="100%",
+                    justify="center",
+                    align="center",
+                ),
+                spacing="3",
+                align="stretch",
+            ),
+            width="100%",
+        ),
+    )
@@ -1,412 +1,110 @@
-import reflex as rx
+# the airports the app knows about, generated from the data by the build step below into airport_table.json
+# one row per airport in the flight dataset: IATA code, a small integer id, ICAO id ("" when iata-icao.parquet has
+# none), name, state and its flights in + out. validation (AIRPORT_CODE_SET), the autocomplete (airport_search.py)
+# and the weather lookup (database.ICAO_conversion) all read this one table so they can't disagree about an airport
+# the ids are stable: a rebuild keeps every existing airport's id and new airports get the next free ones, so they
+# can stand in for the codes in the dictionary encoded flights layout (relayout.py --encode-airports)
+#
+# usage (whenever the dataset changes):
+#   python -m Flight_Analytics_App.data.airport_list /var/data/combinedv2.parquet
+# rewrites Flight_Analytics_App/data/airport_table.json
 
-# list of airports IATA codes
-AIRPORT_CODES_unsorted: list[str] = [
-    "LAS",
-    "GEG",
-    "OAK",
-    "CHS",
-    "LGB",
-    "HRL",
-    "MHK",
-    "ATW",
-    "TVC",
-    "ABI",
-    "AZO",
-    "SGF",
-    "SWO",
-    "TOL",
-    "COS",
-    "PHF",
-    "SWF",
-    "HVN",
-    "JNU",
-    "WRG",
-    "EKO",
-    "RHI",
-    "SFB",
-    "LNY",
-    "CMX",
-    "VEL",
-    "GCC",
-    "FLL",
-    "OKC",
-    "SAT",
-    "PNS",
-    "MTJ",
-    "SBN",
-    "FAR",
-    "LAN",
-    "BPT",
-    "AEX",
-    "FSM",
-    "KOA",
-    "OME",
-    "OTZ",
-    "BJI",
-    "IMT",
-    "PSM",
-    "LBL",
-    "DVL",
-    "SHR",
-    "PHL",
-    "JAX",
-    "RIC",
-    "SAF",
-    "FWA",
-    "CHO",
-    "FNT",
-    "BMI",
-    "SPI",
-    "GCK",
-    "JFK",
-    "PSP",
-    "BGR",
-    "IPT",
-    "JAN",
-    "MLB",
-    "PSG",
-    "APN",
-    "CIU",
-    "USA",
-    "RFD",
-    "OTH",
-    "OGS",
-    "XWA",
-    "HOU",
-    "BUR",
-    "RDU",
-    "ONT",
-    "LBB",
-    "DSM",
-    "DBQ",
-    "TLH",
-    "SJT",
-    "LSE",
-    "HSV",
-    "DFW",
-    "MIA",
-    "SYR",
-    "ILM",
-    "PGV",
-    "MOT",
-    "LWS",
-    "BTM",
-    "DIK",
-    "PQI",
-    "EAU",
-    "MKG",
-    "WYS",
-    "DDC",
-    "ALS",
-    "CLD",
-    "IFP",
-    "MCO",
-    "SMF",
-    "EWR",
-    "CLE",
-    "ABQ",
-    "SJC",
-    "PDX",
-    "IND",
-    "SDF",
-    "FLG",
-    "GJT",
-    "AVP",
-    "SHV",
-    "CLL",
-    "ERI",
-    "MRY",
-    "PSC",
-    "CPR",
-    "BLV",
-    "PAH",
-    "RDD",
-    "ADK",
-    "RIW",
-    "FOD",
-    "ATL",
-    "ORF",
-    "MKE",
-    "MAF",
-    "TUS",
-    "TYS",
-    "BIL",
-    "COU",
-    "GNV",
-    "STX",
-    "JAC",
-    "MDT",
-    "TRI",
-    "AGS",
-    "AVL",
-    "DRO",
-    "FAI",
-    "ALW",
-    "GTF",
-    "BET",
-    "YAK",
-    "DHN",
-    "VLD",
-    "ISN",
-    "PIH",
-    "HYS",
-    "ATY",
-    "GUF",
-    "BNA",
-    "ICT",
-    "OMA",
-    "TUL",
-    "BTR",
-    "ROW",
-    "JLN",
-    "TYR",
-    "SPS",
-    "CRW",
-    "PUW",
-    "GFK",
-    "BGM",
-    "IAG",
-    "OWB",
-    "PVU",
-    "JHM",
-    "GUM",
-    "YNG",
-    "BHM",
-    "RNO",
-    "LRD",
-    "GRB",
-    "FSD",
-    "SAV",
-    "ORH",
-    "OAJ",
-    "DAB",
-    "CDV",
-    "ABY",
-    "BRD",
-    "OGD",
-    "EAR",
-    "UIN",
-    "PRC",
-    "DEC",
-    "TBN",
-    "LGA",
-    "GSP",
-    "RSW",
-    "ROC",
-    "EUG",
-    "LCH",
-    "GSO",
-    "BTV",
-    "ADQ",
-    "ESC",
-    "IDA",
-    "TWF",
-    "HGR",
-    "HOB",
-    "SHD",
-    "PUB",
-    "CGI",
-    "JMS",
-    "BKG",
-    "ROP",
-    "PIR",
-    "BFM",
-    "ALB",
-    "CLT",
-    "MEI",
-    "LFT",
-    "EVV",
-    "GRI",
-    "OGG",
-    "CAE",
-    "BZN",
-    "MOB",
-    "SUN",
-    "SIT",
-    "BQN",
-    "ELM",
-    "SMX",
-    "PIE",
-    "PBG",
-    "RKS",
-    "MCW",
-    "MGW",
-    "MDW",
-    "DTW",
-    "MCI",
-    "SEA",
-    "LIT",
-    "CVG",
-    "CRP",
-    "LIH",
-    "ECP",
-    "BFL",
-    "MFR",
-    "PIB",
-    "GGG",
-    "RST",
-    "FAY",
-    "MSO",
-    "PIA",
-    "SCE",
-    "ITH",
-    "BIS",
-    "ANC",
-    "GTR",
-    "BQK",
-    "DLH",
-    "HIB",
-    "LCK",
-    "ITO",
-    "ACV",
-    "ACK",
-    "HYA",
-    "AKN",
-    "BUF",
-    "SLC",
-    "PVD",
-    "SNA",
-    "SRQ",
-    "SGU",
-    "CYS",
-    "ACT",
-    "GRK",
-    "MSN",
-    "MLU",
-    "SUX",
-    "STT",
-    "HDN",
-    "MYR",
-    "ABE",
-    "DUT",
-    "MBS",
-    "ABR",
-    "SCK",
-    "MKK",
-    "ACY",
-    "LBF",
-    "STC",
-    "DLG",
-    "VCT",
-    "ILG",
-    "PHX",
-    "ELP",
-    "ISP",
-    "SJU",
-    "LAW",
-    "MFE",
-    "XNA",
-    "ALO",
-    "DAY",
-    "VPS",
-    "EWN",
-    "HTS",
-    "EAT",
-    "PSE",
-    "AZA",
-    "PGD",
-    "BFF",
-    "LAR",
-    "MVY",
-    "GST",
-    "PAE",
-    "CDB",
-    "BOS",
-    "DCA",
-    "DEN",
-    "MSY",
-    "DAL",
-    "STL",
-    "PBI",
-    "MEM",
-    "RDM",
-    "CID",
-    "MGM",
-    "MLI",
-    "CMI",
-    "GUC",
-    "EGE",
-    "RAP",
-    "SCC",
-    "YKM",
-    "FCA",
-    "CSG",
-    "CKB",
-    "SLN",
-    "CNY",
-    "MMH",
-    "LAX",
-    "AUS",
-    "MHT",
-    "IAD",
-    "MSP",
-    "HPN",
-    "DRT",
-    "CWA",
-    "MQT",
-    "CHA",
-    "ORD",
-    "HHH",
-    "SBY",
-    "ROA",
-    "LYH",
-    "FLO",
-    "SBA",
-    "HLN",
-    "BLI",
-    "LNK",
-    "LBE",
-    "SAN",
-    "BWI",
-    "PIT",
-    "CMH",
-    "TPA",
-    "GRR",
-    "PWM",
-    "BDL",
-    "BOI",
-    "AMA",
-    "SFO",
-    "ASE",
-    "YUM",
-    "BRO",
-    "LEX",
-    "TXK",
-    "EYW",
-    "CAK",
-    "HNL",
-    "IAH",
-    "FAT",
-    "GPT",
-    "ART",
-    "STS",
-    "SBP",
-    "BRW",
-    "KTN",
-    "PLN",
-    "CDC",
-    "INL",
-    "TTN",
-    "SPN",
-    "LWB",
-    "COD",
-    "PPG",
-    "JST",
-    "BIH",
-    "FMN",
-]
+import argparse
+import json
+import os
+from pathlib import Path
+from types import MappingProxyType
 
-AIRPORT_CODES = sorted(AIRPORT_CODES_unsorted)  # sorted the list
+from .sql import write_atomically
 
+AIRPORTS_PARQUET = Path(__file__).with_name("iata-icao.parquet")
+AIRPORT_TABLE_PATH = Path(__file__).with_name("airport_table.json")
 
-AIRPORT_CODE_SET = set(AIRPORT_CODES)
-AIRPORT_DATALIST_ID = "airport-codes"
+# column order of the rows in airport_table.json
+AIRPORT_COLUMNS = ("code", "id", "icao", "name", "region", "flights")
 
 
-# a way to pass the list into a reflex component so we can provide each element as an input
-def airport_datalist() -> rx.Component:
-    return rx.el.datalist(
-        *[rx.el.option(value=code) for code in AIRPORT_CODES],
-        id=AIRPORT_DATALIST_ID,
-    )
+def load_airport_table(path=AIRPORT_TABLE_PATH) -> tuple[dict, ...]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return tuple(MappingProxyType(dict(zip(data["columns"], row))) for row in data["airports"])
+
+
+# read only since it is shared by every session
+AIRPORT_TABLE = load_airport_table()  # sorted by code
+
+AIRPORT_CODES = [airport["code"] for airport in AIRPORT_TABLE]
+AIRPORT_CODE_SET = frozenset(AIRPORT_CODES)
+
+# IATA -> id (never 0, that's "no such airport" in the encoded layout)
+AIRPORT_IDS = MappingProxyType({airport["code"]: airport["id"] for airport in AIRPORT_TABLE})
+
+# the id -> code mapping the encoded layout ships with (written next to its partitions by relayout.py)
+AIRPORT_IDS_FILENAME = "airport_ids.parquet"
+
+# IATA -> ICAO for the airports that have a METAR station id
+AIRPORT_ICAO = MappingProxyType(
+    {airport["code"]: airport["icao"] for airport in AIRPORT_TABLE if airport["icao"]}
+)
+
+
+# one scan of the flights for the codes + their traffic, joined to iata-icao.parquet for the ICAO id and name
+def build_airport_table(ddb, parquet_path, airports_path=AIRPORTS_PARQUET, out_path=AIRPORT_TABLE_PATH) -> int:
+    rows = ddb.execute(
+        """
+        WITH traffic AS (
+          SELECT code, count(*) AS flights
+          FROM (SELECT unnest([ORIGIN, DEST]) AS code FROM read_parquet(?))
+          GROUP BY 1
+        ),
+        names AS (
+          SELECT iata, icao, airport, region_name
+          FROM read_parquet(?)
+          WHERE iata IS NOT NULL
+          QUALIFY row_number() OVER (PARTITION BY iata ORDER BY icao NULLS LAST) = 1
+        )
+        SELECT code, coalesce(icao, ''), coalesce(airport, ''), coalesce(region_name, ''), flights
+        FROM traffic
+        LEFT JOIN names ON names.iata = traffic.code
+        WHERE code IS NOT NULL
+        ORDER BY code
+        """,
+        [str(parquet_path), str(airports_path)],
+    ).fetchall()
+
+    # keep the ids of the table being replaced
+    previous = {}
+    if os.path.exists(out_path):
+        previous = {airport["code"]: airport["id"] for airport in load_airport_table(out_path)}
+    next_id = max(previous.values(), default=0) + 1
+    table = []
+    for code, *rest in rows:
+        if code not in previous:
+            previous[code] = next_id
+            next_id += 1
+        table.append((code, previous[code], *rest))
+
+    write_airport_table(table, os.path.basename(str(parquet_path)), out_path)
+    return len(table)
+
+
+# one airport per line so a rebuild diffs nicely
+def write_airport_table(rows, source: str, out_path=AIRPORT_TABLE_PATH):
+    header = json.dumps({"source": source, "columns": list(AIRPORT_COLUMNS)}, ensure_ascii=False)
+    lines = ",\n".join("  " + json.dumps(list(row), ensure_ascii=False) for row in rows)
+
+    text = header[:-1] + ', "airports": [\n' + lines + "\n]}\n"
+    write_atomically(out_path, lambda tmp_path: Path(tmp_path).write_text(text, encoding="utf-8"))
+
+
+if __name__ == "__main__":
+    import duckdb
+
+    parser = argparse.ArgumentParser(description="Build the airport table (codes, ICAO ids, traffic) from the dataset")
+    parser.add_argument("parquet_path", help="path to the raw flights parquet file")
+    parser.add_argument("--airports", default=str(AIRPORTS_PARQUET), help="IATA / ICAO parquet file")
+    parser.add_argument("--out", default=str(AIRPORT_TABLE_PATH), help="output path")
+    args = parser.parse_args()
+
+    count = build_airport_table(duckdb, args.parquet_path, args.airports, args.out)
+    print(f"wrote {count} airports to {args.out}")
@@ -0,0 +1,97 @@
+# airport mode: every route out of (and into) one airport with its volume and on time / delay / cancel rates
+# ONE grouped query per airport and horizon answers both directions (ORIGIN = airport OR DEST = airport,
+# grouped by direction + the other airport), cached per dataset version. sorting and paging happen here on
+# the cached rows so a hub like ATL or ORD only ever sends one page to the browser / api client
+
+import os
+
+from ..metrics import span, timed
+from .cache import TTLCache
+from .database import _airport_code, _airport_keys, _layout, _stats_dict
+from .metadata import horizon_window
+
+AIRPORT_DIRECTIONS = ("outbound", "inbound")
+# columns the routes can be sorted by (partner = the airport at the other end)
+AIRPORT_SORT_KEYS = ("scheduled", "on_time_per", "delayed_per", "cancelled_per", "diverted_per", "partner")
+
+# rows per page (AIRPORT_ROUTES_PAGE_SIZE env var) and the largest page the api hands out
+AIRPORT_PAGE_SIZE = int(os.environ.get("AIRPORT_ROUTES_PAGE_SIZE", 20))
+AIRPORT_MAX_PAGE_SIZE = 500
+
+# (airport, horizon, dataset fingerprint) -> {"outbound": [...], "inbound": [...]}
+AIRPORT_CACHE = TTLCache(maxsize=256, ttl=6 * 60 * 60)
+
+
+# the airport's routes in both directions for one horizon, busiest first
+@timed("airport_routes")
+def airport_routes_all(ddb, month_count, airport) -> dict[str, list[dict]]:
+    key = (airport, str(month_count), ddb.fingerprint())
+    return AIRPORT_CACHE.get_or_compute(key, lambda: _airport_routes(ddb, month_count, airport))
+
+
+def _airport_routes(ddb, month_count, airport):
+    start_date, end_date = horizon_window(ddb, month_count)
+
+    layout = _layout(ddb)
+    with span("airport_query"):
+        rows = ddb.run(
+            f"airport_routes_{layout}", [start_date, end_date, *_airport_keys(ddb, layout, airport)]
+        ).fetchall()
+
+    routes = {direction: [] for direction in AIRPORT_DIRECTIONS}
+    for direction, partner, *counts in rows:
+        routes[direction].append({"partner": _airport_code(ddb, layout, partner), **_stats_dict(*counts)})
+    for direction_routes in routes.values():
+        direction_routes.sort(key=lambda route: (-route["scheduled"], route["partner"]))
+    return routes
+
+
+# one sorted page of an airport's routes
+# -> {airport, months, start, end, direction, sort, descending, page, page_size, pages, total_routes,
+#     total_flights, routes: [{"origin", "dest", "partner", "scheduled", ..., "on_time_per", ...}]}
+def airport_routes(
+    ddb,
+    airport,
+    month_count,
+    direction="outbound",
+    sort="scheduled",
+    descending=True,
+    page=1,
+    page_size=AIRPORT_PAGE_SIZE,
+):
+    if direction not in AIRPORT_DIRECTIONS:
+        raise ValueError(f"direction must be one of {', '.join(AIRPORT_DIRECTIONS)}")
+    if sort not in AIRPORT_SORT_KEYS:
+        raise ValueError(f"sort must be one of {', '.join(AIRPORT_SORT_KEYS)}")
+    if not 1 <= page_size <= AIRPORT_MAX_PAGE_SIZE:
+        raise ValueError(f"page_size must be between 1 and {AIRPORT_MAX_PAGE_SIZE}")
+
+    routes = airport_routes_all(ddb, month_count, airport)[direction]
+    # the cached list is busiest first, python's sort is stable so ties keep that order
+    ordered = sorted(routes, key=lambda route: route[sort], reverse=descending)
+
+    pages = max(1, -(-len(ordered) // page_size))
+    page = min(max(1, page), pages)
+    start_date, end_date = horizon_window(ddb, month_count)
+    return {
+        "airport": airport,
+        "months": int(month_count),
+        "start": start_date,
+        "end": end_date,
+        "direction": direction,
+        "sort": sort,
+        "descending": descending,
+        "page": page,
+        "page_size": page_size,
+        "pages": pages,
+        "total_routes": len(ordered),
+        "total_flights": sum(route["scheduled"] for route in ordered),
+        "routes": [
+            {
+                "origin": airport if direction == "outbound" else route["partner"],
+                "dest": route["partner"] if direction == "outbound" else airport,
+                **route,
+            }
+            for route in ordered[(page - 1) * page_size : page * page_size]
+        ],
+    }
@@ -0,0 +1,185 @@
+# airport autocomplete for the origin / destination inputs
+# every airport in the generated airport table (airport_list.py) gets searchable words: its IATA code, ICAO id,
+# the words of its name ("Dallas/Fort Worth International Airport" -> dallas, fort, worth, ...), its state and
+# the metro area in METRO_AREAS. all the words sit in one sorted list so a prefix is a bisect + a short walk.
+# matches are ranked by how well they match (exact code, code prefix, ICAO prefix, name) and then by the
+# airport's traffic in the dataset (the table's flights column), so "dal" gives DAL, then DFW and the other
+# Dallas airports busiest first. built once per worker at startup (warmup)
+# a table that wasn't built from the dataset has no traffic (flights = 0 everywhere), then the traffic is read off
+# the route x month rollup when there is one (a few thousand rows, never the flights themselves) and without one
+# airports of the same match quality are ranked by code
+
+import bisect
+import os
+import re
+import threading
+
+from ..metrics import span, timed
+from .airport_list import AIRPORT_TABLE
+
+# suggestions per input (AIRPORT_SUGGESTIONS env var)
+SUGGEST_LIMIT = int(os.environ.get("AIRPORT_SUGGESTIONS", 8))
+SUGGEST_MAX_LIMIT = 50
+
+# metro areas whose airports aren't named after the city (iata-icao.parquet has no city column)
+METRO_AREAS = {
+    "Chicago": ("ORD", "MDW"),
+    "Dallas": ("DFW", "DAL"),
+    "Detroit": ("DTW",),
+    "Houston": ("IAH", "HOU"),
+    "Los Angeles": ("LAX", "BUR", "LGB", "ONT", "SNA"),
+    "Miami": ("MIA", "FLL"),
+    "New York": ("JFK", "LGA", "EWR", "HPN", "ISP"),
+    "Orlando": ("MCO", "SFB"),
+    "San Francisco": ("SFO", "OAK", "SJC"),
+    "Washington": ("DCA", "IAD", "BWI"),
+}
+
+# match quality, lower is better (a state name matches a lot of airports so it comes last)
+EXACT_CODE, CODE_PREFIX, ICAO_PREFIX, NAME_PREFIX, REGION_PREFIX = range(5)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+# lower case words, apostrophes dropped so "O'Hare" is "ohare"
+def _words(text: str) -> list[str]:
+    return _WORD.findall((text or "").lower().replace("'", ""))
+
+
+class AirportSearchIndex:
+    def __init__(self, airports: list[dict]):
+        self.airports = airports  # [{"code", "icao", "name", "region", "flights", "metros"}, ...]
+        # (word, airport position, match quality) sorted by word
+        entries = set()
+        for i, airport in enumerate(airports):
+            entries.add((airport["code"].lower(), i, CODE_PREFIX))
+            if airport["icao"]:
+                entries.add((airport["icao"].lower(), i, ICAO_PREFIX))
+            for text in (airport["name"], *airport["metros"]):
+                for word in _words(text):
+                    entries.add((word, i, NAME_PREFIX))
+            for word in _words(airport["region"]):
+                entries.add((word, i, REGION_PREFIX))
+        self.entries = sorted(entries)
+        self.words = [word for word, _, _ in self.entries]
+
+    # {airport position: best match quality} for every airport with a word starting with `prefix`
+    def _prefix_matches(self, prefix: str) -> dict[int, int]:
+        matches = {}
+        for j in range(bisect.bisect_left(self.words, prefix), len(self.words)):
+            word, i, quality = self.entries[j]
+            if not word.startswith(prefix):
+                break
+            if quality == CODE_PREFIX and word == prefix:
+                quality = EXACT_CODE
+            matches[i] = min(quality, matches.get(i, quality))
+        return matches
+
+    # the best `limit` airports for what was typed so far, every word of the query has to match
+    def suggest(self, query: str, limit: int = SUGGEST_LIMIT) -> list[dict]:
+        words = _words(query)
+        if not words:
+            return []
+        matches = self._prefix_matches(words[0])
+        for word in words[1:]:
+            more = self._prefix_matches(word)
+            # multi word queries ("new york", "fort worth") rank by their worst matching word
+            matches = {i: max(quality, more[i], NAME_PREFIX) for i, quality in matches.items() if i in more}
+        ranked = sorted(
+            matches,
+            key=lambda i: (matches[i], -self.airports[i]["flights"], self.airports[i]["code"]),
+        )
+        return [self.airports[i] for i in ranked[:limit]]
+
+    def describe(self) -> str:
+        return f"airport search: {len(self.airports)} airports, {len(self.words)} words"
+
+
+# False when the shipped airport table was never built from the dataset
+TABLE_HAS_TRAFFIC = any(airport["flights"] for airport in AIRPORT_TABLE)
+
+
+# flights in + out per airport from the route x month rollup, None when ddb has no fresh one
+def rollup_traffic(ddb) -> dict[str, int] | None:
+    if not ddb.has_rollup:
+        return None
+    with span("airport_traffic_query"):
+        rows = (
+            ddb.cursor()
+            .execute(
+                """
+                SELECT code, sum(scheduled) FROM (
+                  SELECT unnest([ORIGIN, DEST]) AS code, scheduled FROM route_month
+                ) GROUP BY 1
+                """
+            )
+            .fetchall()
+        )
+    return {code: int(n) for code, n in rows if code is not None}
+
+
+# `traffic` ({code: flights}) replaces the table's flights column when given
+def build_airport_index(table=AIRPORT_TABLE, traffic=None) -> AirportSearchIndex:
+    with span("airport_index_build"):
+        metros = {}
+        for metro, codes in METRO_AREAS.items():
+            for code in codes:
+                metros.setdefault(code, []).append(metro)
+        airports = [
+            {
+                **airport,
+                "flights": airport["flights"] if traffic is None else traffic.get(airport["code"], 0),
+                "metros": metros.get(airport["code"], []),
+            }
+            for airport in table
+        ]
+        return AirportSearchIndex(airports)
+
+
+_index: AirportSearchIndex | None = None
+_index_fingerprint = None  # dataset version the rollup traffic was read from (tables without traffic only)
+_index_lock = threading.Lock()
+
+
+# built once per worker (warmup or the first keystroke), the table only changes with a new deploy
+# a table without traffic ranks by the rollup, so then it's built again when the dataset or its rollup changes
+def get_airport_index() -> AirportSearchIndex:
+    global _index, _index_fingerprint
+    ddb = fingerprint = None
+    if not TABLE_HAS_TRAFFIC:
+        from .connection import get_db  # connection.py imports this module (warmup)
+
+        ddb = get_db()
+        fingerprint = ddb.fingerprint()
+    index = _index
+    if index is not None and _index_fingerprint == fingerprint:
+        return index
+    with _index_lock:
+        if _index is None or _index_fingerprint != fingerprint:
+            _index = build_airport_index(traffic=None if ddb is None else rollup_traffic(ddb))
+            _index_fingerprint = fingerprint
+        return _index
+
+
+def load_airport_index():
+    index = get_airport_index()
+    if not TABLE_HAS_TRAFFIC:
+        print("airport table has no traffic (not built from the dataset), ranking by the rollup's flights")
+    print(index.describe())
+    return index
+
+
+# [{"code": "DFW", "label": "DFW · Dallas/Fort Worth International Airport", "icao", "name", "region", "flights"}, ...]
+@timed("airport_suggest")
+def suggest_airports(query: str, limit: int = SUGGEST_LIMIT) -> list[dict]:
+    return [
+        {
+            "code": airport["code"],
+            "label": f"{airport['code']} · {airport['name']}" if airport["name"] else airport["code"],
+            "icao": airport["icao"],
+            "name": airport["name"],
+            "region": airport["region"],
+            "flights": airport["flights"],
+        }
+        for airport in get_airport_index().suggest(query, limit)
+    ]
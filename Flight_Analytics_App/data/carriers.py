@@ -0,0 +1,33 @@
+# airline names for the BTS OP_UNIQUE_CARRIER codes (carrier breakdown chart)
+# codes that aren't listed here are shown as the bare code
+
+CARRIER_NAMES = {
+    "9E": "Endeavor Air",
+    "AA": "American Airlines",
+    "AS": "Alaska Airlines",
+    "B6": "JetBlue",
+    "C5": "CommuteAir",
+    "DL": "Delta Air Lines",
+    "EV": "ExpressJet",
+    "F9": "Frontier Airlines",
+    "G4": "Allegiant Air",
+    "G7": "GoJet Airlines",
+    "HA": "Hawaiian Airlines",
+    "MQ": "Envoy Air",
+    "MX": "Breeze Airways",
+    "NK": "Spirit Airlines",
+    "OH": "PSA Airlines",
+    "OO": "SkyWest Airlines",
+    "QX": "Horizon Air",
+    "SY": "Sun Country Airlines",
+    "UA": "United Airlines",
+    "VX": "Virgin America",
+    "WN": "Southwest Airlines",
+    "YV": "Mesa Airlines",
+    "YX": "Republic Airways",
+    "ZW": "Air Wisconsin",
+}
+
+
+def carrier_name(code: str) -> str:
+    return CARRIER_NAMES.get(code, code)
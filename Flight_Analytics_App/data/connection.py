@@ -0,0 +1,220 @@
+# one DuckDB connection per worker process + one cursor per thread
+# the flight dataset, the route x month (and route x carrier x month) rollups and the delay histograms get registered as views once when the
+# connection opens, and the queries in database.PREPARED_STATEMENTS get PREPAREd once per cursor
+# so the hot path (analyze) doesn't re-read parquet metadata or re-plan the SQL on every click
+
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .database import (
+    PREPARED_STATEMENTS,
+    carrier_rollup_is_fresh,
+    carrier_rollup_path,
+    dataset_fingerprint,
+    rollup_is_fresh,
+    rollup_path,
+)
+from .airport_list import AIRPORT_IDS_FILENAME
+from .airport_search import load_airport_index
+from .delay_hist import delay_hist_is_fresh, delay_hist_path
+from .route_index import load_route_index
+from .sql import sql_literal
+
+# duckdb is imported when the first connection opens (warmup), not when the app package is imported
+if TYPE_CHECKING:
+    import duckdb
+
+# paths we look for the flight dataset in (first one that exists wins)
+# FLIGHT_DATASET_PATH env var overrides both
+CLOUD_DATASET_PATH = Path("/var/data/combinedv2.parquet")
+LOCAL_DATASET_PATH = Path("/home/sai/Downloads/combinedv2.parquet")
+
+
+# optional year/month partitioned copy of the dataset (written by relayout.py)
+# when set, the flights view reads it instead of the single file
+def partitioned_path() -> str:
+    return os.environ.get("FLIGHT_PARTITIONED_PATH", "")
+
+
+def dataset_path() -> str:
+    env_path = os.environ.get("FLIGHT_DATASET_PATH")
+    if env_path:
+        return env_path
+    if LOCAL_DATASET_PATH.exists():
+        return str(LOCAL_DATASET_PATH)
+    if CLOUD_DATASET_PATH.exists():
+        return str(CLOUD_DATASET_PATH)
+    print("Please set the correct path for your parquet dataset (FLIGHT_DATASET_PATH)")
+    return ""
+
+
+class FlightDB:
+    def __init__(
+        self,
+        parquet_path: str,
+        partitioned_dir: str = "",
+    ):
+        self.parquet_path = parquet_path
+        self.partitioned_dir = partitioned_dir
+        self.has_rollup = False
+        self.has_carrier_rollup = False
+        self.has_delay_hist = False
+        self.is_partitioned = False
+        self.is_encoded = False  # partitioned layout with origin_id / dest_id instead of ORIGIN / DEST
+        self.airport_ids = {}  # code -> id of the encoded layout (its airport_ids.parquet)
+        self.airport_codes = {}  # id -> code
+        self.flights_files = ""  # file or glob the flights view reads
+
+        import duckdb
+
+        self._conn = duckdb.connect()
+        # keeps parquet footers / metadata cached between queries
+        self._conn.execute("SET enable_object_cache = true")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._register_views()
+        self._fingerprint = self._current_fingerprint()
+
+    def _create_view(self, name: str, path: str):
+        self._conn.execute(
+            f"CREATE OR REPLACE VIEW {name} AS SELECT * FROM read_parquet({sql_literal(path)})"
+        )
+
+    # other threads keep querying while fingerprint() re-registers the views, so the flags they pick the SQL
+    # by are worked out in locals and swapped in together once the views are there
+    def _register_views(self):
+        has_rollup = has_carrier_rollup = has_delay_hist = False
+        is_partitioned = is_encoded = False
+        airport_ids, airport_codes = {}, {}
+        flights_files = ""
+
+        if self.partitioned_dir and os.path.isdir(self.partitioned_dir):
+            pattern = os.path.join(self.partitioned_dir, "year=*", "month=*", "*.parquet")
+            self._conn.execute(
+                f"CREATE OR REPLACE VIEW flights AS "
+                f"SELECT * FROM read_parquet({sql_literal(pattern)}, hive_partitioning = true)"
+            )
+            is_partitioned = True
+            flights_files = pattern
+
+            # dictionary encoded airports (relayout.py --encode-airports) -> the id mapping it was written with
+            ids_path = os.path.join(self.partitioned_dir, AIRPORT_IDS_FILENAME)
+            if os.path.exists(ids_path):
+                rows = self._conn.execute(
+                    f"SELECT code, id FROM read_parquet({sql_literal(ids_path)})"
+                ).fetchall()
+                airport_ids = dict(rows)
+                airport_codes = {airport_id: code for code, airport_id in rows}
+                is_encoded = True
+        elif self.parquet_path and os.path.exists(self.parquet_path):
+            self._create_view("flights", self.parquet_path)
+            flights_files = self.parquet_path
+
+        if self.parquet_path and rollup_is_fresh(self.parquet_path):
+            self._create_view("route_month", rollup_path(self.parquet_path))
+            has_rollup = True
+
+        if self.parquet_path and carrier_rollup_is_fresh(self.parquet_path):
+            self._create_view("route_carrier_month", carrier_rollup_path(self.parquet_path))
+            has_carrier_rollup = True
+
+        if self.parquet_path and delay_hist_is_fresh(self.parquet_path):
+            self._create_view("route_delay_hist", delay_hist_path(self.parquet_path))
+            has_delay_hist = True
+
+        self.airport_ids, self.airport_codes = airport_ids, airport_codes
+        self.flights_files = flights_files
+        self.is_partitioned, self.is_encoded = is_partitioned, is_encoded
+        self.has_rollup, self.has_carrier_rollup, self.has_delay_hist = (
+            has_rollup,
+            has_carrier_rollup,
+            has_delay_hist,
+        )
+
+    # the source, the partitioned copy and the files built from the source (rollups, delay histograms), so
+    # building or rebuilding any of them after the data drops is picked up without a restart
+    def _current_fingerprint(self):
+        derived = ()
+        if self.parquet_path:
+            derived = tuple(
+                dataset_fingerprint(path(self.parquet_path))
+                for path in (rollup_path, carrier_rollup_path, delay_hist_path)
+            )
+        return (
+            dataset_fingerprint(self.parquet_path),
+            dataset_fingerprint(self.partitioned_dir) if self.partitioned_dir else None,
+            *derived,
+        )
+
+    # changes whenever the dataset, the partitioned copy, a rollup or the delay histograms are replaced on disk
+    # when it does the views get registered again so a rollup that is now stale stops being used (and a fresh
+    # one starts being used), and every cache keyed on the fingerprint starts over
+    def fingerprint(self):
+        fingerprint = self._current_fingerprint()
+        if fingerprint != self._fingerprint:
+            with self._lock:
+                if fingerprint != self._fingerprint:
+                    self._register_views()
+                    self._fingerprint = fingerprint
+        return fingerprint
+
+    # each thread gets its own cursor (DuckDB connections aren't safe to share between threads)
+    # prepared statements are per cursor so they get prepared here the first time a thread asks
+    def cursor(self) -> "duckdb.DuckDBPyConnection":
+        cur = getattr(self._local, "cursor", None)
+        if cur is None:
+            import duckdb
+
+            cur = self._conn.cursor()
+            self._local.cursor = cur
+            self._local.prepared = set()
+            for name in PREPARED_STATEMENTS:
+                try:
+                    self._prepare(name)
+                except (duckdb.CatalogException, duckdb.BinderException):
+                    # view isn't registered (no dataset / no rollup) or is the other layout
+                    # -> statement isn't available (yet), run() tries again if it's ever needed
+                    pass
+        return cur
+
+    def _prepare(self, name: str):
+        self._local.cursor.execute(f"PREPARE {name} AS {PREPARED_STATEMENTS[name]}")
+        self._local.prepared.add(name)
+
+    # run one of the prepared statements from database.PREPARED_STATEMENTS
+    def run(self, name: str, params: list):
+        cur = self.cursor()
+        if name not in self._local.prepared:
+            self._prepare(name)
+        args = ", ".join(sql_literal(p) for p in params)
+        return cur.execute(f"EXECUTE {name}({args})")
+
+    def close(self):
+        self._conn.close()
+
+
+_db: FlightDB | None = None
+_db_pid: int | None = None
+_db_lock = threading.Lock()
+
+
+# the connection for this worker. checks the pid so a forked worker never reuses its parent's connection
+def get_db() -> FlightDB:
+    global _db, _db_pid
+    if _db is None or _db_pid != os.getpid():
+        with _db_lock:
+            if _db is None or _db_pid != os.getpid():
+                _db = FlightDB(dataset_path(), partitioned_dir=partitioned_path())
+                _db_pid = os.getpid()
+    return _db
+
+
+# called once at app startup so the first user doesn't pay for opening the connection,
+# building the route index or the airport search index
+def warmup():
+    db = get_db()
+    db.cursor()
+    load_route_index(db)
+    load_airport_index()
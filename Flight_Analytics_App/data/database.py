@@ -1,162 +1,521 @@
-import duckdb as ddb
-
-
-# scheduled - all count of the route
-def route_query_scheduled(ddb, parquet_path, month_count, source_airport, dest_airport):
-
-    if month_count == "1":  # also consider in the logic that mount count = start month
-        month_count = "2025-06-01"
-    elif month_count == "3":
-        month_count = "2025-04-01"
-    elif month_count == "6":
-        month_count = "2025-01-01"
-    elif month_count == "12":
-        month_count = "2024-06-30"
-    elif month_count == "24":
-        month_count = "2023-06-30"
-    elif month_count == "90":  # max
-        month_count = "2018-01-01"
-
-    sql = """
-    SELECT count(*) AS route_count
-    FROM read_parquet(?)
-    WHERE flight_date BETWEEN CAST(? AS DATE) AND '2025-06-30'  -- remember we are hardcoding the end_date (dataset limit)
-      AND ORIGIN = ?
-      AND DEST = ?
-    """
-    return ddb.execute(
-        sql, [parquet_path, month_count, source_airport, dest_airport]
-    ).fetchone()[0]
-
-
-def on_time_count(ddb, parquet_path, month_count, source_airport, dest_airport):
-
-    if month_count == "1":  # also consider in the logic that mount count = start month
-        month_count = "2025-06-01"
-    elif month_count == "3":
-        month_count = "2025-04-01"
-    elif month_count == "6":
-        month_count = "2025-01-01"
-    elif month_count == "12":
-        month_count = "2024-06-30"
-    elif month_count == "24":
-        month_count = "2023-06-30"
-    elif month_count == "90":  # max
-        month_count = "2018-01-01"
-
-    sql = """
-    SELECT count(*) AS route_count
-    FROM read_parquet(?)
-    WHERE flight_date BETWEEN CAST(? AS DATE) AND '2025-06-30'  -- remember we are hardcoding the end_date (dataset limit)
-      AND ORIGIN = ?
-      AND DEST = ?
-      AND CANCELLED = 0
-      AND ARR_DELAY < 15
-    """
-    return ddb.execute(
-        sql, [parquet_path, month_count, source_airport, dest_airport]
-    ).fetchone()[0]
-
-
-def cancelled_count(ddb, parquet_path, month_count, source_airport, dest_airport):
-
-    if month_count == "1":  # also consider in the logic that mount count = start month
-        month_count = "2025-06-01"
-    elif month_count == "3":
-        month_count = "2025-04-01"
-    elif month_count == "6":
-        month_count = "2025-01-01"
-    elif month_count == "12":
-        month_count = "2024-06-30"
-    elif month_count == "24":
-        month_count = "2023-06-30"
-    elif month_count == "90":  # max
-        month_count = "2018-01-01"
-
-    sql = """
-    SELECT count(*) AS route_count
-    FROM read_parquet(?)
-    WHERE flight_date BETWEEN CAST(? AS DATE) AND '2025-06-30'  -- remember we are hardcoding the end_date (dataset limit)
-      AND ORIGIN = ?
-      AND DEST = ?
-      AND CANCELLED = 1
-    """
-    return ddb.execute(
-        sql, [parquet_path, month_count, source_airport, dest_airport]
-    ).fetchone()[0]
-
-
-def delayed_count(ddb, parquet_path, month_count, source_airport, dest_airport):
-
-    if month_count == "1":  # also consider in the logic that mount count = start month
-        month_count = "2025-06-01"
-    elif month_count == "3":
-        month_count = "2025-04-01"
-    elif month_count == "6":
-        month_count = "2025-01-01"
-    elif month_count == "12":
-        month_count = "2024-06-30"
-    elif month_count == "24":
-        month_count = "2023-06-30"
-    elif month_count == "90":  # max
-        month_count = "2018-01-01"
-
-    sql = """
-    SELECT count(*) AS route_count
-    FROM read_parquet(?)
-    WHERE flight_date BETWEEN CAST(? AS DATE) AND '2025-06-30'  -- remember we are hardcoding the end_date (dataset limit)
-      AND ORIGIN = ?
-      AND DEST = ?
-      AND CANCELLED = 0
-      AND ARR_DELAY >= 15
+import os
+
+from ..metrics import span, timed
+from .airport_list import AIRPORT_ICAO
+from .cache import TTLCache
+from .carriers import carrier_name
+from .delay_hist import (
+    DELAY_PERCENTILES,
+    histogram_buckets,
+    histogram_quantile,
+    merge_histograms,
+)
+from .metadata import horizon_window
+from .route_index import get_route_index
+
+# the category definitions shared by every query that splits a route into on time / delayed / cancelled / diverted
+# (single scan, rollup build, ...) so all of them give the same numbers as the pie chart
+ROUTE_COUNTS_SQL = """
+      count(*) AS scheduled,
+      count(*) FILTER (WHERE CANCELLED = 0 AND ARR_DELAY < 15) AS on_time,
+      count(*) FILTER (WHERE CANCELLED = 0 AND ARR_DELAY >= 15) AS delayed,
+      count(*) FILTER (WHERE CANCELLED = 1) AS cancelled,
+      count(*) FILTER (WHERE DIVERTED = 1) AS diverted
+"""
+
+# queries that run against the flights themselves, written once for every layout of them:
+#   raw          the single parquet file
+#   partitioned  the year/month partitioned copy (relayout.py)
+#   encoded      the partitioned copy with dictionary encoded airports (relayout.py --encode-airports)
+# $1 / $2 are the window, $3 / $4 the airports. {origin} / {dest} are the layout's airport columns, {prune} is
+# where the partitioned layouts get their year/month conditions, {counts} is ROUTE_COUNTS_SQL
+FLIGHTS_STATEMENTS = {
+    "route_stats": """
+    SELECT {counts}
+    FROM flights
+    WHERE flight_date BETWEEN CAST($1 AS DATE) AND CAST($2 AS DATE){prune}
+      AND {origin} = $3
+      AND {dest} = $4
+    """,
+    # the same counts per month (trend chart), one row per month that had flights
+    # GROUP BY 1 because the partitioned layout has its own integer `month` column
+    "route_trend": """
+    SELECT CAST(date_trunc('month', flight_date) AS DATE) AS month_start, {counts}
+    FROM flights
+    WHERE flight_date BETWEEN CAST($1 AS DATE) AND CAST($2 AS DATE){prune}
+      AND {origin} = $3
+      AND {dest} = $4
+    GROUP BY 1
+    ORDER BY 1
+    """,
+    # the same 5 counts per airline (carrier breakdown chart), one row per carrier that flew the route
+    "route_carriers": """
+    SELECT OP_UNIQUE_CARRIER, {counts}
+    FROM flights
+    WHERE flight_date BETWEEN CAST($1 AS DATE) AND CAST($2 AS DATE){prune}
+      AND {origin} = $3
+      AND {dest} = $4
+    GROUP BY 1
+    """,
+    # airport mode (airport_routes.py): every route into or out of one airport, both directions in one grouped
+    # query -> one row per direction and airport at the other end
+    "airport_routes": """
+    SELECT
+      CASE WHEN {origin} = $3 THEN 'outbound' ELSE 'inbound' END AS direction,
+      CASE WHEN {origin} = $3 THEN {dest} ELSE {origin} END AS partner,
+      {counts}
+    FROM flights
+    WHERE flight_date BETWEEN CAST($1 AS DATE) AND CAST($2 AS DATE){prune}
+      AND ({origin} = $3 OR {dest} = $3)
+    GROUP BY 1, 2
+    """,
+}
+
+FLIGHTS_LAYOUTS = ("raw", "partitioned", "encoded")
+
+# how each layout stores the airports -> (origin column, dest column, type)
+# the encoded layout has USMALLINT ids instead of the codes. the codes get translated to ids before they're bound
+# (_airport_keys) and ids in the results back to codes (_airport_code)
+AIRPORT_KEY_COLUMNS = {
+    "raw": ("ORIGIN", "DEST", "VARCHAR"),
+    "partitioned": ("ORIGIN", "DEST", "VARCHAR"),
+    "encoded": ("origin_id", "dest_id", "USMALLINT"),
+}
+
+# year/month conditions on the start of the window. these are what let DuckDB skip whole partitions,
+# flight_date alone would still open every file
+PARTITION_PRUNING_SQL = """
+      AND year >= year(CAST({start} AS DATE))
+      AND (year > year(CAST({start} AS DATE)) OR month >= month(CAST({start} AS DATE)))"""
+
+
+# one of the templates above for one layout of the flights, `start` is the parameter holding the window start
+# {code_list} is the list type airport keys get bound as (batch queries)
+def _flights_sql(template: str, layout: str, start: str = "$1") -> str:
+    origin, dest, key_type = AIRPORT_KEY_COLUMNS[layout]
+    return template.format(
+        origin=origin,
+        dest=dest,
+        code_list=f"{key_type}[]",
+        counts=ROUTE_COUNTS_SQL,
+        prune="" if layout == "raw" else PARTITION_PRUNING_SQL.format(start=start),
+    )
+
+
+# queries that run on every analyze click. the connection manager (connection.py) PREPAREs these once per cursor
+# against the registered views (flights, route_month, ...) so they only get parsed and planned once
+PREPARED_STATEMENTS = {
+    f"{name}_{layout}": _flights_sql(template, layout)
+    for name, template in FLIGHTS_STATEMENTS.items()
+    for layout in FLIGHTS_LAYOUTS
+}
+PREPARED_STATEMENTS.update(
+    {
+        # the rollup has one row per ORIGIN, DEST, month so whole month horizons are just a sum over a handful of rows
+        "route_stats_rollup": """
+    SELECT
+      CAST(coalesce(sum(scheduled), 0) AS BIGINT),
+      CAST(coalesce(sum(on_time), 0) AS BIGINT),
+      CAST(coalesce(sum(delayed), 0) AS BIGINT),
+      CAST(coalesce(sum(cancelled), 0) AS BIGINT),
+      CAST(coalesce(sum(diverted), 0) AS BIGINT)
+    FROM route_month
+    WHERE month BETWEEN CAST($1 AS DATE) AND CAST($2 AS DATE)
+      AND ORIGIN = $3
+      AND DEST = $4
+    """,
+        # the rollup already has one row per route and month
+        "route_trend_rollup": """
+    SELECT month, scheduled, on_time, delayed, cancelled, diverted
+    FROM route_month
+    WHERE month BETWEEN CAST($1 AS DATE) AND CAST($2 AS DATE)
+      AND ORIGIN = $3
+      AND DEST = $4
+    ORDER BY month
+    """,
+        # arrival delay distribution of one route (delay_hist.py): the per month histograms, summed in python
+        "route_delay_hist": """
+    SELECT bins, counts
+    FROM route_delay_hist
+    WHERE month BETWEEN CAST($1 AS DATE) AND CAST($2 AS DATE)
+      AND ORIGIN = $3
+      AND DEST = $4
+    """,
+        # route x carrier x month rollup (rollup.py)
+        "route_carriers_rollup": """
+    SELECT
+      OP_UNIQUE_CARRIER,
+      CAST(sum(scheduled) AS BIGINT),
+      CAST(sum(on_time) AS BIGINT),
+      CAST(sum(delayed) AS BIGINT),
+      CAST(sum(cancelled) AS BIGINT),
+      CAST(sum(diverted) AS BIGINT)
+    FROM route_carrier_month
+    WHERE month BETWEEN CAST($1 AS DATE) AND CAST($2 AS DATE)
+      AND ORIGIN = $3
+      AND DEST = $4
+    GROUP BY 1
+    """,
+        "airport_routes_rollup": """
+    SELECT
+      CASE WHEN ORIGIN = $3 THEN 'outbound' ELSE 'inbound' END AS direction,
+      CASE WHEN ORIGIN = $3 THEN DEST ELSE ORIGIN END AS partner,
+      CAST(sum(scheduled) AS BIGINT),
+      CAST(sum(on_time) AS BIGINT),
+      CAST(sum(delayed) AS BIGINT),
+      CAST(sum(cancelled) AS BIGINT),
+      CAST(sum(diverted) AS BIGINT)
+    FROM route_month
+    WHERE month BETWEEN CAST($1 AS DATE) AND CAST($2 AS DATE)
+      AND (ORIGIN = $3 OR DEST = $3)
+    GROUP BY 1, 2
+    """,
+    }
+)
+
+# the same layouts for many routes at once (batch api): the requested pairs come in as two parallel lists
+# ($origins[i], $dests[i]) and everything is answered by ONE grouped query, one row per route that has flights
+# not PREPAREd since the lists change size with every request
+BATCH_FLIGHTS_STATEMENT = """
+    WITH pairs AS (
+      SELECT unnest(CAST($origins AS {code_list})) AS {origin}, unnest(CAST($dests AS {code_list})) AS {dest}
+    )
+    SELECT {origin}, {dest}, {counts}
+    FROM flights
+    SEMI JOIN pairs USING ({origin}, {dest})
+    WHERE flight_date BETWEEN CAST($start AS DATE) AND CAST($end AS DATE){prune}
+    GROUP BY {origin}, {dest}
     """
-    return ddb.execute(
-        sql, [parquet_path, month_count, source_airport, dest_airport]
-    ).fetchone()[0]
-
-
-def diverted_count(ddb, parquet_path, month_count, source_airport, dest_airport):
-
-    if month_count == "1":  # also consider in the logic that mount count = start month
-        month_count = "2025-06-01"
-    elif month_count == "3":
-        month_count = "2025-04-01"
-    elif month_count == "6":
-        month_count = "2025-01-01"
-    elif month_count == "12":
-        month_count = "2024-06-30"
-    elif month_count == "24":
-        month_count = "2023-06-30"
-    elif month_count == "90":  # max
-        month_count = "2018-01-01"
-
-    sql = """
-    SELECT count(*) AS route_count
-    FROM read_parquet(?)
-    WHERE flight_date BETWEEN CAST(? AS DATE) AND '2025-06-30'  -- remember we are hardcoding the end_date (dataset limit)
-      AND ORIGIN = ?
-      AND DEST = ?
-      AND DIVERTED = 1
+
+BATCH_STATEMENTS = {
+    layout: _flights_sql(BATCH_FLIGHTS_STATEMENT, layout, start="$start") for layout in FLIGHTS_LAYOUTS
+}
+BATCH_STATEMENTS["rollup"] = """
+    WITH pairs AS (
+      SELECT unnest(CAST($origins AS VARCHAR[])) AS ORIGIN, unnest(CAST($dests AS VARCHAR[])) AS DEST
+    )
+    SELECT
+      ORIGIN,
+      DEST,
+      CAST(sum(scheduled) AS BIGINT),
+      CAST(sum(on_time) AS BIGINT),
+      CAST(sum(delayed) AS BIGINT),
+      CAST(sum(cancelled) AS BIGINT),
+      CAST(sum(diverted) AS BIGINT)
+    FROM route_month
+    SEMI JOIN pairs USING (ORIGIN, DEST)
+    WHERE month BETWEEN CAST($start AS DATE) AND CAST($end AS DATE)
+    GROUP BY ORIGIN, DEST
     """
-    return ddb.execute(
-        sql, [parquet_path, month_count, source_airport, dest_airport]
-    ).fetchone()[0]
+
+
+# the rollup lives right next to the source parquet -> combinedv2.parquet -> combinedv2.route_month.parquet
+# built offline with: python -m Flight_Analytics_App.data.rollup <parquet_path>
+def rollup_path(parquet_path):
+    root, _ = os.path.splitext(str(parquet_path))
+    return root + ".route_month.parquet"
+
+
+# only use the rollup if it exists and was built after the last change to the source file
+def rollup_is_fresh(parquet_path):
+    rollup = rollup_path(parquet_path)
+    try:
+        return os.path.getmtime(rollup) >= os.path.getmtime(parquet_path)
+    except OSError:
+        return False
+
+
+# same for the route x carrier x month rollup -> combinedv2.route_carrier_month.parquet (built by the same command)
+def carrier_rollup_path(parquet_path):
+    root, _ = os.path.splitext(str(parquet_path))
+    return root + ".route_carrier_month.parquet"
+
+
+def carrier_rollup_is_fresh(parquet_path):
+    try:
+        return os.path.getmtime(carrier_rollup_path(parquet_path)) >= os.path.getmtime(parquet_path)
+    except OSError:
+        return False
+
+
+# identifies one version of a data file (size + last modified) -> part of every cache key
+# so dropping in a new parquet file invalidates everything cached for the old one
+def dataset_fingerprint(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+
+# route results shared by every session in this worker
+# key -> (origin, dest, horizon, dataset fingerprint). the dataset only changes monthly so the TTL is just a safety net
+ROUTE_CACHE = TTLCache(maxsize=2048, ttl=6 * 60 * 60)
+
+
+# all 5 counts in ONE query (conditional aggregation)
+# ddb here is the FlightDB connection manager from connection.py (get_db())
+# the horizon window comes from the dataset's real date range (metadata.horizon_window)
+# answered from the route x month rollup when there is a fresh one, otherwise from the raw flights (partitioned layout if configured)
+# returns a dict with the counts + the percentages from percent_calc, cached in ROUTE_CACHE
+@timed("route_stats")
+def route_stats(ddb, month_count, source_airport, dest_airport):
+    key = (source_airport, dest_airport, str(month_count), ddb.fingerprint())
+    stats = ROUTE_CACHE.get_or_compute(
+        key, lambda: _route_stats(ddb, month_count, source_airport, dest_airport)
+    )
+    return dict(stats)  # copy so callers can't change the cached entry
+
+
+# which copy of the data answers route queries: the rollup when there is a fresh one, otherwise the raw flights
+# (partitioned layout if configured)
+def _layout(ddb):
+    if ddb.has_rollup:
+        return "rollup"
+    return _flights_layout(ddb)
+
+
+# the flights themselves: encoded / plain partitioned layout if configured, otherwise the single file
+def _flights_layout(ddb):
+    if ddb.is_encoded:
+        return "encoded"
+    if ddb.is_partitioned:
+        return "partitioned"
+    return "raw"
+
+
+# airport codes the way `layout` stores them: ids in the encoded layout, the codes everywhere else
+# an airport the encoded layout has no id for becomes 0, which no airport has -> matches no flights
+def _airport_keys(ddb, layout, *codes) -> list:
+    if layout != "encoded":
+        return list(codes)
+    return [ddb.airport_ids.get(code, 0) for code in codes]
+
+
+# and back, for results that name airports
+def _airport_code(ddb, layout, key):
+    if layout != "encoded":
+        return key
+    return ddb.airport_codes.get(key, "")
+
+
+def _route_stats(ddb, month_count, source_airport, dest_airport):
+
+    start_date, end_date = horizon_window(ddb, month_count)
+
+    # prefix sum index over the rollup (route_index.py) when it's loaded -> no query at all
+    index = get_route_index(ddb)
+    if index is not None:
+        with span("route_index_lookup"):
+            counts = index.counts(source_airport, dest_airport, start_date, end_date)
+        return _stats_dict(*counts)
+
+    layout = _layout(ddb)
+    with span("route_query"):
+        counts = ddb.run(
+            f"route_stats_{layout}",
+            [start_date, end_date, *_airport_keys(ddb, layout, source_airport, dest_airport)],
+        ).fetchone()
+
+    return _stats_dict(*counts)
+
+
+# per month counts + percentages for one route over a horizon (trend chart)
+# -> [{"month": "2025-01", "scheduled": ..., "on_time": ..., ..., "on_time_per": ..., ...}, ...]
+# one entry for every month of the window (months without flights are zeros) from ONE grouped query,
+# or straight from the route index / rollup. cached in ROUTE_CACHE next to the route_stats results
+@timed("route_trend")
+def route_trend(ddb, month_count, source_airport, dest_airport):
+    key = ("trend", source_airport, dest_airport, str(month_count), ddb.fingerprint())
+    trend = ROUTE_CACHE.get_or_compute(
+        key, lambda: _route_trend(ddb, month_count, source_airport, dest_airport)
+    )
+    return [dict(month) for month in trend]
+
+
+def _route_trend(ddb, month_count, source_airport, dest_airport):
+    start_date, end_date = horizon_window(ddb, month_count)
+
+    index = get_route_index(ddb)
+    if index is not None:
+        with span("route_index_lookup"):
+            rows = index.monthly_counts(source_airport, dest_airport, start_date, end_date)
+    else:
+        layout = _layout(ddb)
+        with span("route_query"):
+            rows = ddb.run(
+                f"route_trend_{layout}",
+                [start_date, end_date, *_airport_keys(ddb, layout, source_airport, dest_airport)],
+            ).fetchall()
+
+    by_month = {month.strftime("%Y-%m"): counts for month, *counts in rows}
+    return [
+        {"month": month, **_stats_dict(*by_month.get(month, (0, 0, 0, 0, 0)))}
+        for month in _month_labels(start_date, end_date)
+    ]
+
+
+# "YYYY-MM" for every month between two ISO dates
+def _month_labels(start_date, end_date):
+    year, month = int(start_date[:4]), int(start_date[5:7])
+    end = (int(end_date[:4]), int(end_date[5:7]))
+    labels = []
+    while (year, month) <= end:
+        labels.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return labels
+
+
+# the horizon totals of a trend -> same dict as route_stats (the pie chart), without another query
+def trend_totals(trend):
+    categories = ("scheduled", "on_time", "delayed", "cancelled", "diverted")
+    return _stats_dict(*(sum(month[c] for month in trend) for c in categories))
+
+
+# arrival delay distribution of one route over a horizon (flights that arrived, cancelled / diverted have no delay)
+# -> {"available": True, "flights": n, "p50": ..., "p90": ..., "p99": ...,
+#     "buckets": [{"name": "0-14 min", "flights": n}, ...]}
+# merged from the per month histograms (accuracy bounds in delay_hist.py), cached in ROUTE_CACHE like the other
+# route results. when they weren't built for this dataset -> {"available": False, ...} with no percentiles:
+# the exact quantiles would be a scan of the flights on every new route click
+@timed("route_delays")
+def route_delays(ddb, month_count, source_airport, dest_airport):
+    key = ("delays", source_airport, dest_airport, str(month_count), ddb.fingerprint())
+    delays = ROUTE_CACHE.get_or_compute(
+        key, lambda: _route_delays(ddb, month_count, source_airport, dest_airport)
+    )
+    return {**delays, "buckets": [dict(b) for b in delays["buckets"]]}
+
+
+def _route_delays(ddb, month_count, source_airport, dest_airport):
+    if not ddb.has_delay_hist:
+        return {
+            "available": False,
+            "flights": 0,
+            **{f"p{round(q * 100)}": None for q in DELAY_PERCENTILES},
+            "buckets": [],
+        }
+
+    start_date, end_date = horizon_window(ddb, month_count)
+    with span("delay_hist_merge"):
+        histogram = merge_histograms(
+            ddb.run("route_delay_hist", [start_date, end_date, source_airport, dest_airport]).fetchall()
+        )
+
+    return {
+        "available": True,
+        "flights": sum(histogram),
+        **{f"p{round(q * 100)}": histogram_quantile(histogram, q) for q in DELAY_PERCENTILES},
+        "buckets": histogram_buckets(histogram),
+    }
+
+
+# per airline counts + percentages for one route over a horizon (carrier breakdown chart)
+# -> [{"carrier": "WN", "name": "Southwest Airlines", "scheduled": ..., ..., "on_time_per": ..., ...}, ...]
+# busiest carrier first. ONE grouped query (the carrier rollup when there is a fresh one, otherwise the flights),
+# cached in ROUTE_CACHE with the other route results
+@timed("route_carriers")
+def route_carriers(ddb, month_count, source_airport, dest_airport):
+    key = ("carriers", source_airport, dest_airport, str(month_count), ddb.fingerprint())
+    carriers = ROUTE_CACHE.get_or_compute(
+        key, lambda: _route_carriers(ddb, month_count, source_airport, dest_airport)
+    )
+    return [dict(carrier) for carrier in carriers]
+
+
+def _route_carriers(ddb, month_count, source_airport, dest_airport):
+    start_date, end_date = horizon_window(ddb, month_count)
+
+    layout = "rollup" if ddb.has_carrier_rollup else _flights_layout(ddb)
+    with span("route_query"):
+        rows = ddb.run(
+            f"route_carriers_{layout}",
+            [start_date, end_date, *_airport_keys(ddb, layout, source_airport, dest_airport)],
+        ).fetchall()
+
+    rows.sort(key=lambda row: (-row[1], row[0] or ""))
+    return [
+        {"carrier": carrier or "", "name": carrier_name(carrier or ""), **_stats_dict(*counts)}
+        for carrier, *counts in rows
+    ]
+
+
+# stats for many (origin, dest) pairs at once -> {(origin, dest): same dict as route_stats}
+# one grouped query however many pairs there are (batch api), or one array lookup when the route index is loaded
+# routes without flights come back as all zeros
+# not cached: dashboards asking for hundreds of routes would just push the UI's routes out of ROUTE_CACHE
+def batch_route_stats(ddb, month_count, pairs):
+    pairs = list(dict.fromkeys(pairs))  # dedupe, keep order
+    start_date, end_date = horizon_window(ddb, month_count)
+
+    index = get_route_index(ddb)
+    if index is not None:
+        with span("route_index_lookup"):
+            counts = index.counts_many(pairs, start_date, end_date)
+        return {pair: _stats_dict(*counts[pair]) for pair in pairs}
+
+    layout = _layout(ddb)
+    with span("batch_route_query"):
+        rows = (
+            ddb.cursor()
+            .execute(
+                BATCH_STATEMENTS[layout],
+                {
+                    "start": start_date,
+                    "end": end_date,
+                    "origins": _airport_keys(ddb, layout, *(origin for origin, _ in pairs)),
+                    "dests": _airport_keys(ddb, layout, *(dest for _, dest in pairs)),
+                },
+            )
+            .fetchall()
+        )
+
+    counts = {
+        (_airport_code(ddb, layout, origin), _airport_code(ddb, layout, dest)): rest
+        for origin, dest, *rest in rows
+    }
+    return {pair: _stats_dict(*counts.get(pair, (0, 0, 0, 0, 0))) for pair in pairs}
+
+
+def _stats_dict(scheduled, on_time, delayed, cancelled, diverted):
+    on_time_per, delayed_per, cancelled_per, diverted_per = percent_calc(
+        scheduled, on_time, delayed, cancelled, diverted
+    )
+
+    return {
+        "scheduled": scheduled,
+        "on_time": on_time,
+        "delayed": delayed,
+        "cancelled": cancelled,
+        "diverted": diverted,
+        "on_time_per": on_time_per,
+        "delayed_per": delayed_per,
+        "cancelled_per": cancelled_per,
+        "diverted_per": diverted_per,
+    }
+
+
+class UnknownAirportError(LookupError):
+    pass
 
 
 # for converting between IATA -> ICAO which is needed for the GET response from TAF and METAR
-def ICAO_conversion(ddb, IATA_input):
-    sql = """
-    SELECT  icao  from 'Flight_Analytics_App/data/iata-icao.parquet'
-    WHERE iata = ?
-    """
-    return ddb.execute(sql, [IATA_input]).fetchone()[0]
+# from the generated airport table (airport_list.py), airports without a METAR station aren't in it
+@timed("icao_conversion")
+def ICAO_conversion(IATA_input):
+    try:
+        return AIRPORT_ICAO[IATA_input]
+    except KeyError:
+        raise UnknownAirportError(f"No ICAO code for airport {IATA_input!r}") from None
 
 
 # example usage
-# print(ICAO_conversion(ddb, "ONT"))    # -> KONT
+# print(ICAO_conversion("ONT"))    # -> KONT
 
 
 # calculate percentages
+# not timed: _stats_dict runs it for every row of the batch, leaderboard and airport routes results,
+# the spans of those stages already cover it
 
 
 def percent_calc(
@@ -0,0 +1,169 @@
+# offline build step for per route, per month ARR_DELAY histograms (fixed bins, mergeable by just adding counts)
+# so any horizon's delay distribution / percentiles is a merge of a handful of month rows instead of a raw scan
+# one row per ORIGIN, DEST, month with the non-empty bins only: bins USMALLINT[], counts UINTEGER[]
+#
+# bins (minutes of arrival delay, lower edge inclusive):
+#   < -90 | -90..-30 by 5 | -30..30 by 1 | 30..120 by 5 | 120..360 by 15 | 360..1440 by 60 | >= 1440
+# accuracy of a percentile read from the histogram vs the exact quantile_cont:
+#   exact for whole-minute delays (BTS reports whole minutes) between -30 and 30 minutes,
+#   otherwise off by at most the width of the bin the true value falls in (5 / 15 / 60 minutes),
+#   values below -90 or from 1440 up are clamped to those edges
+#   checked on synthetic data by benchmarks/delay_hist_accuracy.py
+#
+# usage:
+#   python -m Flight_Analytics_App.data.delay_hist /var/data/combinedv2.parquet
+# writes /var/data/combinedv2.delay_hist.parquet next to the source file
+
+import argparse
+import math
+import os
+
+from .sql import write_parquet
+
+# (from, to, width) in minutes, contiguous
+DELAY_SEGMENTS = [(-90, -30, 5), (-30, 30, 1), (30, 120, 5), (120, 360, 15), (360, 1440, 60)]
+
+# lower edge of every bin, bin 0 is everything below the first edge and the last bin everything from the last edge up
+DELAY_BIN_EDGES = [DELAY_SEGMENTS[0][0]] + [
+    lo + i * width for lo, hi, width in DELAY_SEGMENTS for i in range((hi - lo) // width)
+] + [DELAY_SEGMENTS[-1][1]]
+DELAY_BINS = len(DELAY_BIN_EDGES)
+
+
+def _bin_sql(column="ARR_DELAY") -> str:
+    cases = [f"WHEN {column} < {DELAY_SEGMENTS[0][0]} THEN 0"]
+    offset = 1
+    for lo, hi, width in DELAY_SEGMENTS:
+        cases.append(f"WHEN {column} < {hi} THEN {offset} + CAST(floor(({column} - ({lo})) / {width}) AS INTEGER)")
+        offset += (hi - lo) // width
+    return "CASE " + " ".join(cases) + f" ELSE {offset} END"
+
+
+# bin index of ARR_DELAY, same bins as DELAY_BIN_EDGES
+DELAY_BIN_SQL = _bin_sql()
+
+# coarse buckets for the UI / api (made of whole bins)
+DELAY_BUCKETS = [
+    ("Early", None, 0),
+    ("0-14 min", 0, 15),
+    ("15-29 min", 15, 30),
+    ("30-59 min", 30, 60),
+    ("1-2 h", 60, 120),
+    ("2-3 h", 120, 180),
+    ("3 h+", 180, None),
+]
+
+DELAY_PERCENTILES = (0.5, 0.9, 0.99)
+
+
+# the histograms live right next to the source parquet -> combinedv2.parquet -> combinedv2.delay_hist.parquet
+def delay_hist_path(parquet_path):
+    root, _ = os.path.splitext(str(parquet_path))
+    return root + ".delay_hist.parquet"
+
+
+# only use them if they were built after the last change to the source file
+def delay_hist_is_fresh(parquet_path):
+    try:
+        return os.path.getmtime(delay_hist_path(parquet_path)) >= os.path.getmtime(parquet_path)
+    except OSError:
+        return False
+
+
+def build_delay_hist(ddb, parquet_path, out_path=None):
+    out_path = out_path or delay_hist_path(parquet_path)
+
+    sql = f"""
+    WITH binned AS (
+      SELECT
+        ORIGIN,
+        DEST,
+        CAST(date_trunc('month', flight_date) AS DATE) AS month,
+        {DELAY_BIN_SQL} AS bin,
+        count(*) AS n
+      FROM read_parquet(?)
+      WHERE ARR_DELAY IS NOT NULL
+      GROUP BY ALL
+    )
+    SELECT
+      ORIGIN,
+      DEST,
+      month,
+      list(CAST(bin AS USMALLINT) ORDER BY bin) AS bins,
+      list(CAST(n AS UINTEGER) ORDER BY bin) AS counts
+    FROM binned
+    GROUP BY ALL
+    ORDER BY ORIGIN, DEST, month
+    """
+    write_parquet(ddb, sql, [parquet_path], out_path)
+
+    return ddb.execute("SELECT count(*) FROM read_parquet(?)", [out_path]).fetchone()[0]
+
+
+# add up (bins, counts) rows into one dense histogram
+def merge_histograms(rows) -> list[int]:
+    dense = [0] * DELAY_BINS
+    for bins, counts in rows:
+        for b, n in zip(bins, counts):
+            dense[b] += n
+    return dense
+
+
+# estimated value of the k-th smallest delay (0 based): whole minutes in 1 minute bins,
+# spread evenly over the bin otherwise, clamped at the outer edges
+def _order_statistic(histogram, cumulative, k) -> float:
+    b = next(i for i, c in enumerate(cumulative) if c > k)
+    lower = DELAY_BIN_EDGES[b]
+    if b == 0 or b == DELAY_BINS - 1:
+        return float(lower)
+    width = DELAY_BIN_EDGES[b + 1] - lower
+    if width == 1:
+        return float(lower)
+    before = cumulative[b] - histogram[b]
+    return lower + (k - before + 0.5) / histogram[b] * width
+
+
+# same interpolation as DuckDB's quantile_cont, on the histogram
+def histogram_quantile(histogram, q) -> float | None:
+    total = sum(histogram)
+    if total == 0:
+        return None
+    cumulative = []
+    running = 0
+    for n in histogram:
+        running += n
+        cumulative.append(running)
+    position = q * (total - 1)
+    lo = math.floor(position)
+    low_value = _order_statistic(histogram, cumulative, lo)
+    if position == lo:
+        return low_value
+    high_value = _order_statistic(histogram, cumulative, lo + 1)
+    return low_value + (position - lo) * (high_value - low_value)
+
+
+# [{"name": "0-14 min", "flights": n}, ...] for DELAY_BUCKETS
+def histogram_buckets(histogram) -> list[dict]:
+    buckets = []
+    for name, lo, hi in DELAY_BUCKETS:
+        flights = sum(
+            n
+            for edge, n in zip(DELAY_BIN_EDGES, histogram)
+            if (lo is None or edge >= lo) and (hi is None or edge < hi)
+        )
+        buckets.append({"name": name, "flights": flights})
+    return buckets
+
+
+if __name__ == "__main__":
+    import duckdb
+
+    parser = argparse.ArgumentParser(description="Build the route x month ARR_DELAY histograms")
+    parser.add_argument("parquet_path", help="path to the raw flights parquet file")
+    parser.add_argument(
+        "--out", default=None, help="output path (default: next to the source file)"
+    )
+    args = parser.parse_args()
+
+    rows = build_delay_hist(duckdb, args.parquet_path, args.out)
+    print(f"wrote {rows} route x month histograms to {args.out or delay_hist_path(args.parquet_path)}")
@@ -0,0 +1,165 @@
+# nationwide route leaderboard: every route ranked by on time / delayed / cancelled / diverted rate per horizon preset
+# ONE grouped query per dataset version answers every horizon at once (route x month counts, summed per horizon
+# window, ranked with window functions) and only the top LEADERBOARD_SIZE routes of every ranking come back
+# -> held in memory per dataset fingerprint, a few hundred small dicts
+# the counts use the same category definitions as the pie chart (ROUTE_COUNTS_SQL / the rollup)
+
+import os
+from datetime import date
+
+from ..metrics import span
+from .cache import TTLCache
+from .database import FLIGHTS_LAYOUTS, _airport_code, _flights_sql, _layout, _stats_dict
+from .metadata import HORIZON_PRESETS, horizon_window
+
+LEADERBOARD_METRICS = ("on_time", "delayed", "cancelled", "diverted")
+LEADERBOARD_ORDERS = ("highest", "lowest")
+
+# routes kept per ranking (LEADERBOARD_SIZE env var)
+LEADERBOARD_SIZE = int(os.environ.get("LEADERBOARD_SIZE", 25))
+# a route needs this many scheduled flights per month of the horizon to be ranked at all (~daily service by default)
+# so a route with 3 flights and 3 cancellations doesn't top the cancellation ranking
+MIN_FLIGHTS_PER_MONTH = int(os.environ.get("LEADERBOARD_MIN_FLIGHTS_PER_MONTH", 30))
+
+# route x month counts for each layout of the flights (the encoded one is ranked on the ids, turned back into
+# codes below). the rollup already is exactly that
+_MONTHLY_SQL = {
+    layout: _flights_sql(
+        """
+      SELECT
+        {origin} AS ORIGIN,
+        {dest} AS DEST,
+        CAST(date_trunc('month', flight_date) AS DATE) AS month,
+        {counts}
+      FROM flights
+      GROUP BY ALL
+    """,
+        layout,
+    )
+    for layout in FLIGHTS_LAYOUTS
+}
+_MONTHLY_SQL["rollup"] = "SELECT ORIGIN, DEST, month, scheduled, on_time, delayed, cancelled, diverted FROM route_month"
+
+# one row_number() per (metric, order). ties go to the route with more flights
+_RANK_COLUMNS = ",\n".join(
+    f"row_number() OVER (PARTITION BY months ORDER BY {metric} / scheduled "
+    f"{'DESC' if order == 'highest' else 'ASC'}, scheduled DESC, ORIGIN, DEST) AS {metric}_{order}"
+    for metric in LEADERBOARD_METRICS
+    for order in LEADERBOARD_ORDERS
+)
+
+# $months / $starts / $ends / $min_flights are parallel lists, one entry per horizon preset
+LEADERBOARD_SQL = {
+    layout: f"""
+    WITH monthly AS ({monthly}),
+    horizons AS (
+      SELECT
+        unnest(CAST($months AS INTEGER[])) AS months,
+        unnest(CAST($starts AS DATE[])) AS start_date,
+        unnest(CAST($ends AS DATE[])) AS end_date,
+        unnest(CAST($min_flights AS BIGINT[])) AS min_flights
+    ),
+    routes AS (
+      SELECT
+        h.months,
+        m.ORIGIN,
+        m.DEST,
+        CAST(sum(m.scheduled) AS BIGINT) AS scheduled,
+        CAST(sum(m.on_time) AS BIGINT) AS on_time,
+        CAST(sum(m.delayed) AS BIGINT) AS delayed,
+        CAST(sum(m.cancelled) AS BIGINT) AS cancelled,
+        CAST(sum(m.diverted) AS BIGINT) AS diverted
+      FROM monthly m
+      JOIN horizons h ON m.month BETWEEN h.start_date AND h.end_date
+      GROUP BY h.months, h.min_flights, m.ORIGIN, m.DEST
+      HAVING sum(m.scheduled) >= h.min_flights
+    ),
+    ranked AS (
+      SELECT *, count(*) OVER (PARTITION BY months) AS ranked_routes, {_RANK_COLUMNS}
+      FROM routes
+    )
+    SELECT * FROM ranked
+    WHERE least({", ".join(f"{m}_{o}" for m in LEADERBOARD_METRICS for o in LEADERBOARD_ORDERS)}) <= $size
+    """
+    for layout, monthly in _MONTHLY_SQL.items()
+}
+
+# fingerprint -> {months: board}. only changes with the dataset
+_LEADERBOARD_CACHE = TTLCache(maxsize=4, ttl=7 * 24 * 60 * 60)
+
+
+def _month_span(start: str, end: str) -> int:
+    start_date, end_date = date.fromisoformat(start), date.fromisoformat(end)
+    return (end_date.year - start_date.year) * 12 + end_date.month - start_date.month + 1
+
+
+def _build_leaderboards(ddb) -> dict[int, dict]:
+    boards = {}
+    for months, label in HORIZON_PRESETS:
+        start, end = horizon_window(ddb, months)
+        boards[months] = {
+            "months": months,
+            "label": label,
+            "start": start,
+            "end": end,
+            "min_flights": MIN_FLIGHTS_PER_MONTH * _month_span(start, end),
+            "ranked_routes": 0,
+            "rankings": {(m, o): [] for m in LEADERBOARD_METRICS for o in LEADERBOARD_ORDERS},
+        }
+
+    layout = _layout(ddb)
+    with span("leaderboard_build"):
+        cur = ddb.cursor().execute(
+            LEADERBOARD_SQL[layout],
+            {
+                "months": list(boards),
+                "starts": [b["start"] for b in boards.values()],
+                "ends": [b["end"] for b in boards.values()],
+                "min_flights": [b["min_flights"] for b in boards.values()],
+                "size": LEADERBOARD_SIZE,
+            },
+        )
+        columns = [d[0] for d in cur.description]
+        rows = cur.fetchall()
+
+    for values in rows:
+        row = dict(zip(columns, values))
+        board = boards[row["months"]]
+        board["ranked_routes"] = row["ranked_routes"]
+        entry = {
+            "origin": _airport_code(ddb, layout, row["ORIGIN"]),
+            "dest": _airport_code(ddb, layout, row["DEST"]),
+            **_stats_dict(
+                row["scheduled"], row["on_time"], row["delayed"], row["cancelled"], row["diverted"]
+            ),
+        }
+        for key, ranking in board["rankings"].items():
+            rank = row[f"{key[0]}_{key[1]}"]
+            if rank <= LEADERBOARD_SIZE:
+                ranking.append((rank, entry))
+
+    for board in boards.values():
+        for key, ranking in board["rankings"].items():
+            board["rankings"][key] = [entry for _, entry in sorted(ranking, key=lambda r: r[0])]
+    return boards
+
+
+# top routes for one horizon preset by `metric` rate, "highest" or "lowest" first
+# -> {months, label, start, end, min_flights, ranked_routes, metric, order, routes: [route_stats dict + origin/dest]}
+def leaderboard(ddb, month_count, metric="on_time", order="highest", limit=LEADERBOARD_SIZE):
+    if metric not in LEADERBOARD_METRICS:
+        raise ValueError(f"metric must be one of {', '.join(LEADERBOARD_METRICS)}")
+    if order not in LEADERBOARD_ORDERS:
+        raise ValueError(f"order must be one of {', '.join(LEADERBOARD_ORDERS)}")
+
+    boards = _LEADERBOARD_CACHE.get_or_compute(ddb.fingerprint(), lambda: _build_leaderboards(ddb))
+    board = boards.get(int(month_count))
+    if board is None:
+        raise ValueError(f"months must be one of {', '.join(str(m) for m, _ in HORIZON_PRESETS)}")
+
+    return {
+        **{k: v for k, v in board.items() if k != "rankings"},
+        "metric": metric,
+        "order": order,
+        "routes": [dict(entry) for entry in board["rankings"][(metric, order)][:limit]],
+    }
@@ -0,0 +1,84 @@
+# what dates the loaded dataset actually covers + the horizon windows built from that
+# the min/max flight_date come from the parquet footer statistics (no scan of the data itself)
+# and are cached per dataset fingerprint, so a new monthly drop is picked up without touching any code
+
+from datetime import date
+
+from .cache import TTLCache
+
+# the "MAX" horizon preset -> everything from the first month in the dataset
+MAX_MONTHS = 0
+
+# (months, label) for the horizon buttons in the UI and everything precomputed per horizon (leaderboard)
+HORIZON_PRESETS = [
+    (1, "1M"),
+    (3, "3M"),
+    (6, "6M"),
+    (12, "1Y"),
+    (24, "2Y"),
+    # MAX is the whole dataset, whatever range the loaded parquet actually covers
+    (MAX_MONTHS, "MAX"),
+]
+
+# fingerprint -> (min_date, max_date). entries only go stale when the file changes, and then the key changes too
+_BOUNDS_CACHE = TTLCache(maxsize=8, ttl=7 * 24 * 60 * 60)
+
+
+def _to_date(value) -> date:
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])  # stats can be '2025-06-30' or '2025-06-30 00:00:00'
+
+
+def _read_date_bounds(ddb) -> tuple[date, date]:
+    cur = ddb.cursor()
+    min_value, max_value = cur.execute(
+        """
+        SELECT min(stats_min_value), max(stats_max_value)
+        FROM parquet_metadata(?)
+        WHERE path_in_schema = 'flight_date'
+        """,
+        [ddb.flights_files],
+    ).fetchone()
+
+    if min_value is None or max_value is None:
+        # file was written without statistics -> fall back to reading the one column
+        min_value, max_value = cur.execute(
+            "SELECT min(flight_date), max(flight_date) FROM flights"
+        ).fetchone()
+
+    return _to_date(min_value), _to_date(max_value)
+
+
+# (first flight_date, last flight_date) of the dataset ddb (FlightDB) is serving
+def date_bounds(ddb) -> tuple[date, date]:
+    return _BOUNDS_CACHE.get_or_compute(
+        ddb.fingerprint(), lambda: _read_date_bounds(ddb)
+    )
+
+
+def _add_months(d: date, months: int) -> date:
+    total = d.year * 12 + (d.month - 1) + months
+    return date(total // 12, total % 12 + 1, 1)
+
+
+# (start, end) ISO dates for a horizon preset in months ("1", "3", ... or MAX_MONTHS)
+# windows are whole months counted back from the last month in the dataset (1M = just the last month)
+# and always start on the 1st so the route x month rollup can answer them
+def horizon_window(ddb, month_count) -> tuple[str, str]:
+    min_date, max_date = date_bounds(ddb)
+    months = int(month_count)
+
+    first_month = min_date.replace(day=1)
+    if months == MAX_MONTHS:
+        start = first_month
+    else:
+        start = max(_add_months(max_date.replace(day=1), -(months - 1)), first_month)
+
+    return start.isoformat(), max_date.isoformat()
+
+
+# e.g. "Jan 2018 - Jun 2025" for the MAX preset in the UI
+def dataset_range_label(ddb) -> str:
+    min_date, max_date = date_bounds(ddb)
+    return f"{min_date:%b %Y} - {max_date:%b %Y}"
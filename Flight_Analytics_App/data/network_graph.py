@@ -1,16 +1,88 @@
 import base64
+import os
+import threading
+from functools import lru_cache
+from html import escape
 from io import BytesIO
+from urllib.parse import quote
 
-import matplotlib
+from ..metrics import timed
 
-matplotlib.use("Agg")  # server-side
-import matplotlib.pyplot as plt
-import networkx as nx
 
+# which renderer analyze uses: "svg" (default, templated string) or "png" (matplotlib + networkx)
+# set with the ROUTE_GRAPH_RENDERER env var
+ROUTE_GRAPH_RENDERER = os.environ.get("ROUTE_GRAPH_RENDERER", "svg").lower()
 
+
+@timed("graph_render")
+def route_graph_data_url(
+    weight: float = 500, source_airport: str = "", destination_airport: str = ""
+) -> str:
+    if ROUTE_GRAPH_RENDERER == "png":
+        return ab_graph_png_data_url(weight, source_airport, destination_airport)
+    return ab_graph_svg_data_url(weight, source_airport, destination_airport)
+
+
+# the same picture as the png below (816x368 px after the tight crop): title, two nodes, an arrow and the
+# weight in the middle. coordinates / font sizes are measured off the matplotlib output (16pt/18pt/20pt at 160 dpi)
+_SVG_TEMPLATE = """<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 816 368' font-family='DejaVu Sans,sans-serif'>\
+<rect width='816' height='368' fill='#18191b'/>\
+<text x='408' y='38' text-anchor='middle' font-size='40' fill='white'>Total Scheduled flights</text>\
+<g fill='#9ec5ff' stroke='#9ec5ff' stroke-linecap='round' stroke-linejoin='round'>\
+<line x1='134' y1='210' x2='656' y2='210' stroke-width='7.8'/>\
+<polygon points='655,196 683,210 655,224' stroke-width='2'/>\
+<circle cx='77.5' cy='210' r='52.5' stroke='none'/>\
+<circle cx='739' cy='210' r='52.5' stroke='none'/>\
+</g>\
+<g text-anchor='middle' dominant-baseline='central' font-size='35.5' font-weight='bold'>\
+<text x='77.5' y='210'>{source}</text>\
+<text x='739' y='210'>{destination}</text>\
+</g>\
+<rect x='{label_x:.1f}' y='180' width='{label_width:.1f}' height='52' rx='9' fill='#18191b'/>\
+<text x='408' y='221' text-anchor='middle' font-size='44.4' fill='white'>{weight}</text>\
+</svg>"""
+
+
+@lru_cache(maxsize=1024)
+def ab_graph_svg_data_url(
+    weight: float = 500, source_airport: str = "", destination_airport: str = ""
+) -> str:
+    weight_text = str(weight)
+    # background box behind the weight so the arrow stops either side of it (~0.64em per digit + padding)
+    label_width = len(weight_text) * 28.3 + 18
+    svg = _SVG_TEMPLATE.format(
+        source=escape(source_airport),
+        destination=escape(destination_airport),
+        weight=escape(weight_text),
+        label_x=408 - label_width / 2,
+        label_width=label_width,
+    )
+    # only what has to be escaped in a data url -> stays well under 1 KB (base64 would add a third)
+    return "data:image/svg+xml;charset=utf-8," + quote(svg, safe=" '=:/,.-")
+
+
+# pyplot keeps global state so two threads of the query pool must not draw at the same time
+_RENDER_LOCK = threading.Lock()
+
+
+# only rendered when analyze has a new weight, and memoized by (weight, source, destination)
+# so popular routes / repeat clicks don't re-draw the same png (lru_cache is bounded + thread safe)
+@lru_cache(maxsize=256)
 def ab_graph_png_data_url(
     weight: float = 500, source_airport: str = "", destination_airport: str = ""
 ) -> str:
+    with _RENDER_LOCK:
+        return _render_png_data_url(weight, source_airport, destination_airport)
+
+
+def _render_png_data_url(weight, source_airport, destination_airport) -> str:
+    # matplotlib + networkx are only imported the first time a png is actually drawn (cold start)
+    import matplotlib
+
+    matplotlib.use("Agg")  # server-side
+    import matplotlib.pyplot as plt
+    import networkx as nx
+
     G = nx.DiGraph()
     G.add_edge("A", "B")
 
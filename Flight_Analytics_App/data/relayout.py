@@ -0,0 +1,151 @@
+# offline tool that rewrites the single flights parquet into a hive partitioned layout
+#   <out_dir>/year=2025/month=4/data_0.parquet
+# with every partition sorted by ORIGIN, DEST (then flight_date) so the min/max statistics of each row group
+# only cover a narrow slice of routes -> short horizons only open one or a few partitions and the
+# ORIGIN = ? AND DEST = ? filter can skip most row groups inside them
+#
+# --encode-airports dictionary encodes the airports: ORIGIN / DEST become origin_id / dest_id USMALLINT columns
+# (the stable ids from airport_table.json) and the id -> code mapping is written next to the partitions as
+# airport_ids.parquet. the app picks that up and translates codes to ids before querying, so the route filters and
+# group-bys compare small integers and the files get smaller
+#
+# usage:
+#   python -m Flight_Analytics_App.data.relayout /var/data/combinedv2.parquet /var/data/flights_partitioned
+#   python -m Flight_Analytics_App.data.relayout --encode-airports /var/data/combinedv2.parquet /var/data/flights_encoded
+# then point the app at it with FLIGHT_PARTITIONED_PATH=/var/data/flights_partitioned
+
+import argparse
+import glob
+import os
+import shutil
+
+import duckdb as ddb
+
+from .airport_list import AIRPORT_IDS, AIRPORT_IDS_FILENAME
+from .sql import sql_literal, write_parquet
+
+# rows per row group. smaller groups = finer pruning on ORIGIN/DEST, bigger groups = less per group overhead
+# (DuckDB's default is 122880, one month of the BTS data is ~600k rows)
+DEFAULT_ROW_GROUP_SIZE = 32768
+
+
+# code -> id for every airport in the dataset: the airport table's ids, airports the table doesn't have yet get
+# the ids after its highest one. written to <out_dir>/airport_ids.parquet
+def write_airport_ids(ddb, parquet_path, out_dir) -> str:
+    codes = [
+        code
+        for (code,) in ddb.execute(
+            "SELECT DISTINCT code FROM (SELECT unnest([ORIGIN, DEST]) AS code FROM read_parquet(?)) "
+            "WHERE code IS NOT NULL ORDER BY code",
+            [parquet_path],
+        ).fetchall()
+    ]
+    ids = dict(AIRPORT_IDS)
+    next_id = max(ids.values(), default=0) + 1
+    for code in codes:
+        if code not in ids:
+            ids[code] = next_id
+            next_id += 1
+    used = {code: ids[code] for code in codes}
+
+    path = os.path.join(out_dir, AIRPORT_IDS_FILENAME)
+    write_parquet(
+        ddb,
+        "SELECT unnest(CAST(? AS USMALLINT[])) AS id, unnest(CAST(? AS VARCHAR[])) AS code",
+        [list(used.values()), list(used)],
+        path,
+        options="FORMAT parquet",
+    )
+    return path
+
+
+# everything is written to <out_dir>.tmp and moved into place at the end so FLIGHT_PARTITIONED_PATH never points
+# at a half written layout, a failed run only leaves the .tmp / .staging directories behind (cleared on the next run)
+def relayout(ddb, parquet_path, out_dir, row_group_size=DEFAULT_ROW_GROUP_SIZE, encode_airports=False):
+    out_dir = os.path.normpath(out_dir)
+    if os.path.exists(out_dir):
+        raise FileExistsError(f"{out_dir} already exists, remove it first")
+
+    tmp_dir = out_dir + ".tmp"
+    staging_dir = out_dir + ".staging"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    if encode_airports:
+        ids_path = write_airport_ids(ddb, parquet_path, tmp_dir)
+        rows = f"""
+          SELECT
+            f.* EXCLUDE (ORIGIN, DEST),
+            o.id AS origin_id,
+            d.id AS dest_id,
+            year(f.flight_date) AS year,
+            month(f.flight_date) AS month
+          FROM read_parquet(?) f
+          LEFT JOIN read_parquet({sql_literal(ids_path)}) o ON o.code = f.ORIGIN
+          LEFT JOIN read_parquet({sql_literal(ids_path)}) d ON d.code = f.DEST
+        """
+        route_columns = "origin_id, dest_id"
+    else:
+        rows = "SELECT *, year(flight_date) AS year, month(flight_date) AS month FROM read_parquet(?)"
+        route_columns = "ORIGIN, DEST"
+
+    # pass 1: split by year/month. DuckDB's partitioned write doesn't keep the row order within a partition
+    # so this only buckets the rows
+    ddb.execute(
+        f"""
+        COPY ({rows}) TO {sql_literal(staging_dir)} (FORMAT parquet, PARTITION_BY (year, month))
+        """,
+        [parquet_path],
+    )
+
+    # pass 2: rewrite every partition (one month, so this stays small) sorted by route with an explicit
+    # row group size. DuckDB always writes min/max statistics per row group, that's what the pruning runs on
+    # year / month are only in the directory names, the app reads them back with hive_partitioning
+    partitions = sorted(glob.glob(os.path.join(staging_dir, "year=*", "month=*")))
+    for partition in partitions:
+        target_dir = os.path.join(tmp_dir, os.path.relpath(partition, staging_dir))
+        os.makedirs(target_dir, exist_ok=True)
+        target = os.path.join(target_dir, "data_0.parquet")
+
+        ddb.execute(
+            f"""
+            COPY (
+              SELECT *
+              FROM read_parquet(?, hive_partitioning = false)
+              ORDER BY {route_columns}, flight_date
+            ) TO {sql_literal(target)} (
+              FORMAT parquet,
+              COMPRESSION zstd,
+              ROW_GROUP_SIZE {int(row_group_size)}
+            )
+            """,
+            [os.path.join(partition, "*.parquet")],
+        )
+
+    shutil.rmtree(staging_dir)
+    os.replace(tmp_dir, out_dir)
+    return len(partitions)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Rewrite the flights parquet as year/month partitions sorted by ORIGIN, DEST"
+    )
+    parser.add_argument("parquet_path", help="path to the raw flights parquet file")
+    parser.add_argument("out_dir", help="directory to write the partitioned dataset to")
+    parser.add_argument(
+        "--row-group-size",
+        type=int,
+        default=DEFAULT_ROW_GROUP_SIZE,
+        help=f"rows per parquet row group (default: {DEFAULT_ROW_GROUP_SIZE})",
+    )
+    parser.add_argument(
+        "--encode-airports",
+        action="store_true",
+        help="store ORIGIN / DEST as small integer ids (origin_id / dest_id) plus an id -> code mapping",
+    )
+    args = parser.parse_args()
+
+    count = relayout(ddb, args.parquet_path, args.out_dir, args.row_group_size, args.encode_airports)
+    print(f"wrote {count} year/month partitions to {args.out_dir}")
@@ -0,0 +1,66 @@
+# offline build step for the route x month rollup that route_stats() answers from
+# one row per ORIGIN, DEST, month with the same 5 counts as the pie chart -> a few hundred thousand rows
+# instead of millions of flights
+# plus the same counts per airline (one row per ORIGIN, DEST, OP_UNIQUE_CARRIER, month) for route_carriers()
+#
+# usage:
+#   python -m Flight_Analytics_App.data.rollup /var/data/combinedv2.parquet
+# writes /var/data/combinedv2.route_month.parquet and /var/data/combinedv2.route_carrier_month.parquet
+# next to the source file
+
+import argparse
+
+import duckdb as ddb
+
+from .database import ROUTE_COUNTS_SQL, carrier_rollup_path, rollup_path
+from .sql import write_parquet
+
+
+def build_rollup(ddb, parquet_path, out_path=None):
+    return _write_rollup(ddb, parquet_path, out_path or rollup_path(parquet_path), ["ORIGIN", "DEST"])
+
+
+def build_carrier_rollup(ddb, parquet_path, out_path=None):
+    return _write_rollup(
+        ddb,
+        parquet_path,
+        out_path or carrier_rollup_path(parquet_path),
+        ["ORIGIN", "DEST", "OP_UNIQUE_CARRIER"],
+    )
+
+
+def _write_rollup(ddb, parquet_path, out_path, keys):
+    sql = f"""
+    SELECT
+      {", ".join(keys)},
+      CAST(date_trunc('month', flight_date) AS DATE) AS month,
+      {ROUTE_COUNTS_SQL}
+    FROM read_parquet(?)
+    GROUP BY ALL
+    ORDER BY {", ".join(keys)}, month
+    """
+    write_parquet(ddb, sql, [parquet_path], out_path)
+
+    return ddb.execute("SELECT count(*) FROM read_parquet(?)", [out_path]).fetchone()[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the route x month rollup")
+    parser.add_argument("parquet_path", help="path to the raw flights parquet file")
+    parser.add_argument(
+        "--out", default=None, help="output path (default: next to the source file)"
+    )
+    parser.add_argument(
+        "--carrier-out",
+        default=None,
+        help="output path of the per carrier rollup (default: next to the source file)",
+    )
+    args = parser.parse_args()
+
+    rows = build_rollup(ddb, args.parquet_path, args.out)
+    print(f"wrote {rows} route x month rows to {args.out or rollup_path(args.parquet_path)}")
+    rows = build_carrier_rollup(ddb, args.parquet_path, args.carrier_out)
+    print(
+        f"wrote {rows} route x carrier x month rows to "
+        f"{args.carrier_out or carrier_rollup_path(args.parquet_path)}"
+    )
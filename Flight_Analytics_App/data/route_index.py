@@ -0,0 +1,199 @@
+# in-process prefix sum index over the route x month rollup
+# every route gets a dense integer id and a row of cumulative monthly counts (scheduled, on_time, delayed,
+# cancelled, diverted) in one NumPy array, so any whole-month window is
+#   cumulative[route, last_month + 1] - cumulative[route, first_month]
+# two lookups and a subtraction, no query at all. built at startup (warmup) when there is a fresh rollup,
+# rebuilt when the dataset changes, and route_stats / batch_route_stats fall back to DuckDB whenever it isn't loaded
+# ROUTE_INDEX=0 env var turns it off
+
+import os
+import sys
+import threading
+from datetime import date
+from typing import TYPE_CHECKING
+
+from ..metrics import span
+
+# numpy is imported when the index is built (warmup), not when the app package is imported
+if TYPE_CHECKING:
+    import numpy as np
+
+ROUTE_INDEX_ENABLED = os.environ.get("ROUTE_INDEX", "1") != "0"
+# don't build an index bigger than this (ROUTE_INDEX_MAX_MB env var), queries stay on DuckDB instead
+# the real dataset is ~7k routes x 90 months -> ~13 MB
+ROUTE_INDEX_MAX_MB = float(os.environ.get("ROUTE_INDEX_MAX_MB", 1024))
+
+# column order of the counts in the index (= the order route_stats unpacks them in)
+CATEGORIES = ("scheduled", "on_time", "delayed", "cancelled", "diverted")
+
+
+def _month_number(d: date) -> int:
+    return d.year * 12 + d.month - 1
+
+
+class RouteIndex:
+    def __init__(self, route_ids: dict, first_month: date, cumulative: "np.ndarray", fingerprint):
+        self.route_ids = route_ids  # (ORIGIN, DEST) -> row in cumulative
+        self.first_month = first_month
+        self.cumulative = cumulative  # (routes, months + 1, 5), cumulative[:, 0] is all zeros
+        self.fingerprint = fingerprint
+        self.months = cumulative.shape[1] - 1
+
+    # [lo, hi) month positions for an ISO date window, clamped to the months the rollup covers
+    def _bounds(self, start: str, end: str) -> tuple[int, int]:
+        base = _month_number(self.first_month)
+        lo = _month_number(date.fromisoformat(start)) - base
+        hi = _month_number(date.fromisoformat(end)) - base + 1
+        lo = min(max(lo, 0), self.months)
+        hi = min(max(hi, lo), self.months)
+        return lo, hi
+
+    # (scheduled, on_time, delayed, cancelled, diverted) for one route between two month aligned dates
+    # a route that never flew is all zeros, same as the query
+    def counts(self, origin: str, dest: str, start: str, end: str) -> tuple[int, ...]:
+        route_id = self.route_ids.get((origin, dest))
+        if route_id is None:
+            return (0,) * len(CATEGORIES)
+        lo, hi = self._bounds(start, end)
+        row = self.cumulative[route_id]
+        return tuple(int(n) for n in row[hi] - row[lo])
+
+    # [(month as date, counts), ...] for every month of the window the route had flights in
+    def monthly_counts(self, origin: str, dest: str, start: str, end: str) -> list[tuple]:
+        route_id = self.route_ids.get((origin, dest))
+        if route_id is None:
+            return []
+        lo, hi = self._bounds(start, end)
+        monthly = (self.cumulative[route_id, lo + 1 : hi + 1] - self.cumulative[route_id, lo:hi]).tolist()
+        base = _month_number(self.first_month)
+        return [
+            (date((base + lo + i) // 12, (base + lo + i) % 12 + 1, 1), *counts)
+            for i, counts in enumerate(monthly)
+            if counts[0]
+        ]
+
+    # same for many routes at once (one fancy-indexed subtraction)
+    def counts_many(self, pairs: list[tuple[str, str]], start: str, end: str) -> dict:
+        known = [pair for pair in pairs if pair in self.route_ids]
+        result = {pair: (0,) * len(CATEGORIES) for pair in pairs}
+        if known:
+            lo, hi = self._bounds(start, end)
+            ids = [self.route_ids[pair] for pair in known]
+            totals = self.cumulative[ids, hi] - self.cumulative[ids, lo]
+            for pair, row in zip(known, totals.tolist()):
+                result[pair] = tuple(row)
+        return result
+
+    # bytes held by the index (array + the route id dict)
+    def nbytes(self) -> int:
+        ids = sys.getsizeof(self.route_ids) + sum(
+            sys.getsizeof(key) + sys.getsizeof(key[0]) + sys.getsizeof(key[1])
+            for key in self.route_ids
+        )
+        return self.cumulative.nbytes + ids
+
+    def describe(self) -> str:
+        return (
+            f"route index: {len(self.route_ids)} routes x {self.months} months "
+            f"({self.first_month:%b %Y} onwards), {self.nbytes() / 1e6:.1f} MB"
+        )
+
+
+# the rollup can't be indexed (empty, or bigger than ROUTE_INDEX_MAX_MB) -> queries stay on DuckDB
+class RouteIndexSkipped(Exception):
+    pass
+
+
+def build_route_index(ddb) -> RouteIndex:
+    import numpy as np
+
+    cur = ddb.cursor()
+    with span("route_index_build"):
+        fingerprint = ddb.fingerprint()
+        first_month, last_month, routes = cur.execute(
+            "SELECT min(month), max(month), count(DISTINCT (ORIGIN, DEST)) FROM route_month"
+        ).fetchone()
+        if first_month is None:
+            raise RouteIndexSkipped("route_month is empty")
+
+        months = _month_number(last_month) - _month_number(first_month) + 1
+        # peak while building = the int64 monthly counts + the int32 cumulative array
+        peak_mb = routes * (months + 1) * len(CATEGORIES) * (8 + 4) / 1e6
+        if peak_mb > ROUTE_INDEX_MAX_MB:
+            raise RouteIndexSkipped(
+                f"route index would need ~{peak_mb:.0f} MB to build "
+                f"({routes} routes x {months} months, ROUTE_INDEX_MAX_MB={ROUTE_INDEX_MAX_MB:.0f})"
+            )
+
+        rows = cur.execute(
+            """
+            SELECT
+              dense_rank() OVER (ORDER BY ORIGIN, DEST) - 1 AS route_id,
+              datediff('month', CAST($first AS DATE), month) AS month_index,
+              ORIGIN, DEST, scheduled, on_time, delayed, cancelled, diverted
+            FROM route_month
+            """,
+            {"first": first_month},
+        ).fetchnumpy()
+
+        monthly = np.zeros((routes, months, len(CATEGORIES)), dtype=np.int64)
+        monthly[rows["route_id"], rows["month_index"]] = np.column_stack(
+            [rows[c] for c in CATEGORIES]
+        )
+
+        np.cumsum(monthly, axis=1, out=monthly)
+        # int32 is plenty unless one route ever passes 2 billion flights -> half the memory
+        fits_int32 = monthly[:, -1].max(initial=0) <= np.iinfo(np.int32).max
+        cumulative = np.zeros(
+            (routes, months + 1, len(CATEGORIES)), dtype=np.int32 if fits_int32 else np.int64
+        )
+        cumulative[:, 1:] = monthly
+        del monthly
+
+        route_ids = {
+            (origin, dest): int(route_id)
+            for route_id, origin, dest in zip(
+                rows["route_id"].tolist(), rows["ORIGIN"].tolist(), rows["DEST"].tolist()
+            )
+        }
+
+    return RouteIndex(route_ids, first_month, cumulative, fingerprint)
+
+
+_index: RouteIndex | None = None
+_index_lock = threading.Lock()
+_skipped_fingerprint = None  # dataset version the index was too large for -> don't retry on every query
+
+
+# the index for the dataset ddb is serving right now, or None -> answer from DuckDB
+# (turned off, no fresh rollup, too large). rebuilt once when the dataset fingerprint changes
+def get_route_index(ddb) -> RouteIndex | None:
+    global _index, _skipped_fingerprint
+    if not ROUTE_INDEX_ENABLED:
+        return None
+    fingerprint = ddb.fingerprint()  # re-registers the views first if the files changed
+    if not ddb.has_rollup or fingerprint == _skipped_fingerprint:
+        return None
+    # other threads swap _index under the lock, so read it once
+    index = _index
+    if index is not None and index.fingerprint == fingerprint:
+        return index
+    with _index_lock:
+        index = _index
+        if index is None or index.fingerprint != fingerprint:
+            try:
+                index = build_route_index(ddb)
+            except RouteIndexSkipped as e:
+                print(f"route index not built: {e}")
+                _skipped_fingerprint = fingerprint
+                return None
+            _index = index
+    return index
+
+
+# startup: build the index and say how much memory it takes
+def load_route_index(ddb):
+    index = get_route_index(ddb)
+    if index is not None:
+        print(index.describe())
+    return index
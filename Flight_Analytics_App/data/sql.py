@@ -0,0 +1,32 @@
+# small helpers for the SQL we hand to DuckDB as text (prepared statement arguments, COPY targets, file paths)
+# and for the offline build steps that write the files the app reads
+
+import os
+from datetime import date
+
+
+# DuckDB can't bind ? parameters into EXECUTE or as a COPY ... TO target (it doesn't bind in order with the
+# other parameters) so those go in as literals. everything we render is a file path, an already validated
+# airport code, a date or a number
+def sql_literal(value) -> str:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    if isinstance(value, date):
+        value = value.isoformat()
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+# write(tmp_path) writes the file next to out_path, which then gets renamed into place
+# so the app never reads a half written file
+def write_atomically(out_path, write):
+    tmp_path = str(out_path) + ".tmp"
+    write(tmp_path)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+# COPY (query) to out_path
+def write_parquet(ddb, query: str, params: list, out_path, options="FORMAT parquet, COMPRESSION zstd"):
+    return write_atomically(
+        out_path, lambda tmp_path: ddb.execute(f"COPY ({query}) TO {sql_literal(tmp_path)} ({options})", params)
+    )
@@ -0,0 +1,188 @@
+# current METAR data from aviationweather.gov
+# one shared httpx.AsyncClient per worker (keep-alive connection pool) and one request for both airports
+# (the api takes a comma separated list in ids) instead of two blocking requests with fresh connections
+# METAR_CACHE at the bottom sits in front of all of it
+
+import asyncio
+import contextlib
+import os
+import time
+from typing import TYPE_CHECKING
+
+from ..metrics import span
+
+# httpx is imported with the first request, not when the app package is imported
+if TYPE_CHECKING:
+    import httpx
+
+METAR_URL = "https://aviationweather.gov/api/data/metar"
+METAR_TIMEOUT = 5  # seconds, same as the old blocking calls
+
+_client: "httpx.AsyncClient | None" = None
+
+
+# anything that went wrong talking to aviationweather.gov (connection, timeout, bad status, unreadable body)
+class WeatherUnavailableError(Exception):
+    pass
+
+
+def get_client() -> "httpx.AsyncClient":
+    global _client
+    if _client is None or _client.is_closed:
+        import httpx
+
+        _client = httpx.AsyncClient(
+            headers={"User-Agent": "wx-test"},
+            timeout=METAR_TIMEOUT,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _client
+
+
+# lifespan task -> closes the pool when the worker shuts down
+@contextlib.asynccontextmanager
+async def weather_client_lifespan():
+    try:
+        yield
+    finally:
+        if _client is not None:
+            await _client.aclose()
+
+
+# {icao id: metar dict} for every station the api returned something for
+# stations without a current report are just missing from the dict
+async def fetch_metars(icao_ids: list[str]) -> dict[str, dict]:
+    import httpx
+
+    try:
+        resp = await get_client().get(
+            METAR_URL, params={"ids": ",".join(icao_ids), "format": "json"}
+        )
+        resp.raise_for_status()
+    except httpx.HTTPError as e:
+        raise WeatherUnavailableError(str(e)) from e
+    if not resp.content:  # api answers 204 / empty body when none of the stations have data
+        return {}
+    # a maintenance page or a cut off body still comes back as a 200
+    try:
+        metars = resp.json()
+    except ValueError as e:
+        raise WeatherUnavailableError(f"METAR api returned invalid JSON: {e}") from e
+    if not isinstance(metars, list):
+        raise WeatherUnavailableError(f"METAR api returned {type(metars).__name__}, expected a list")
+    return {metar["icaoId"]: metar for metar in metars if isinstance(metar, dict) and "icaoId" in metar}
+
+
+# process wide METAR cache in front of fetch_metars
+# - fresh for `ttl` seconds -> answered from memory
+# - after that, for another `stale_ttl` seconds the old report is still served right away while one background
+#   fetch refreshes it (stale-while-revalidate), METARs only change about once an hour anyway
+# - concurrent requests for a station that is already being fetched wait on that same fetch (coalescing)
+# - stations with no current report are cached too (as None) so they don't get re-asked on every click
+# the fetcher is pluggable (any async fn taking a list of icao ids and returning {icao: metar}) for local testing
+class MetarCache:
+    def __init__(self, fetcher=fetch_metars, ttl: float = 600, stale_ttl: float = 3600):
+        self.fetcher = fetcher
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: dict[str, tuple[float, dict | None]] = {}  # icao -> (fetched_at, metar)
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._background: set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.fetches = 0
+        self.errors = 0
+
+    # {icao: metar or None} for every id asked for
+    async def get_many(self, icao_ids: list[str]) -> dict[str, dict | None]:
+        now = time.monotonic()
+        result: dict[str, dict | None] = {}
+        to_fetch: list[str] = []
+        to_refresh: list[str] = []
+        waiting: dict[str, asyncio.Future] = {}
+
+        for icao in dict.fromkeys(icao_ids):  # dedupe, keep order
+            entry = self._entries.get(icao)
+            age = now - entry[0] if entry is not None else None
+
+            if age is not None and age < self.ttl:
+                self.hits += 1
+                result[icao] = entry[1]
+            elif age is not None and age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                result[icao] = entry[1]
+                if icao not in self._inflight:
+                    to_refresh.append(icao)
+            elif icao in self._inflight:
+                self.coalesced += 1
+                waiting[icao] = self._inflight[icao]
+            else:
+                self.misses += 1
+                to_fetch.append(icao)
+
+        if to_refresh:
+            self._start_fetch(to_refresh)  # nobody waits on it, the stale report was already served
+
+        if to_fetch:
+            waiting.update(self._start_fetch(to_fetch))
+
+        for icao, future in waiting.items():
+            result[icao] = await asyncio.shield(future)
+
+        return result
+
+    # one batched request for all `icao_ids`, with a future per station that other callers can wait on
+    def _start_fetch(self, icao_ids: list[str]) -> dict[str, asyncio.Future]:
+        loop = asyncio.get_running_loop()
+        futures = {icao: loop.create_future() for icao in icao_ids}
+        self._inflight.update(futures)
+        task = loop.create_task(self._fetch(futures))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return futures
+
+    async def _fetch(self, futures: dict[str, asyncio.Future]):
+        self.fetches += 1
+        try:
+            with span("metar_fetch"):
+                metars = await self.fetcher(list(futures))
+        except Exception as e:
+            self.errors += 1
+            for icao, future in futures.items():
+                self._inflight.pop(icao, None)
+                future.set_exception(e)
+                future.exception()  # mark retrieved so a refresh nobody waits on doesn't log
+            return
+
+        fetched_at = time.monotonic()
+        for icao, future in futures.items():
+            metar = metars.get(icao)
+            self._entries[icao] = (fetched_at, metar)
+            self._inflight.pop(icao, None)
+            future.set_result(metar)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "fetches": self.fetches,
+            "errors": self.errors,
+            "size": len(self._entries),
+            "hit_rate": ((self.hits + self.stale_hits) / lookups) if lookups else 0.0,
+        }
+
+
+# METAR_TTL_SECONDS / METAR_STALE_SECONDS env vars override the defaults
+METAR_CACHE = MetarCache(
+    fetch_metars,
+    ttl=float(os.environ.get("METAR_TTL_SECONDS", 600)),
+    stale_ttl=float(os.environ.get("METAR_STALE_SECONDS", 3600)),
+)
@@ -0,0 +1,22 @@
+# bounded thread pool for the blocking work behind analyze (duckdb queries, graph rendering)
+# so one slow query never blocks the worker's event loop for every other connected user
+# duckdb releases the GIL while it runs so the queries actually run side by side
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# FLIGHT_QUERY_WORKERS env var overrides the pool size (defaults to the number of cores)
+MAX_WORKERS = int(os.environ.get("FLIGHT_QUERY_WORKERS", 0)) or min(
+    32, os.cpu_count() or 4
+)
+
+QUERY_EXECUTOR = ThreadPoolExecutor(
+    max_workers=MAX_WORKERS, thread_name_prefix="flight-query"
+)
+
+
+# await a blocking function on the pool from an async event handler
+async def run_blocking(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(QUERY_EXECUTOR, func, *args)
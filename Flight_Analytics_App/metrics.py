@@ -0,0 +1,228 @@
+# lightweight in-process metrics, served at /metrics (see api.py) in the prometheus text format
+# every stage of analyze (route query, delay histograms, graph render, ICAO lookup, METAR fetch, ...) is wrapped in
+# a span -> one latency histogram + in flight gauge + error counter per stage
+# cache hit rates are read from the caches themselves when /metrics is scraped
+# all of it is per worker process (same as the caches and the duckdb connection)
+
+import bisect
+import contextlib
+import functools
+import inspect
+import threading
+import time
+
+# seconds. route queries take a few ms, a png render ~0.1 s, a METAR round trip up to its 5 s timeout
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)  # fmt: skip
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)  # per bucket, made cumulative when rendered
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.buckets, value)
+        if i < len(self.buckets):
+            self.bucket_counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+
+_lock = threading.Lock()
+_histograms: dict[str, Histogram] = {}  # stage -> latency histogram
+_in_flight: dict[str, int] = {}  # stage -> spans currently open
+_errors: dict[str, int] = {}  # stage -> spans that ended with an exception
+
+
+# times the block as one `stage`, works in sync code and around awaits
+@contextlib.contextmanager
+def span(stage: str):
+    with _lock:
+        _in_flight[stage] = _in_flight.get(stage, 0) + 1
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        with _lock:
+            _in_flight[stage] -= 1
+            histogram = _histograms.get(stage)
+            if histogram is None:
+                histogram = _histograms[stage] = Histogram()
+            histogram.observe(elapsed)
+            if failed:
+                _errors[stage] = _errors.get(stage, 0) + 1
+
+
+# decorator version of span for whole functions (sync, async or async generators like reflex event handlers)
+def timed(stage: str):
+    def decorator(func):
+        if inspect.isasyncgenfunction(func):
+
+            @functools.wraps(func)
+            async def async_gen_wrapper(*args, **kwargs):
+                with span(stage):
+                    async for item in func(*args, **kwargs):
+                        yield item
+
+            return async_gen_wrapper
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _errors.clear()
+        _in_flight.clear()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _stage_lines() -> list[str]:
+    with _lock:
+        histograms = {
+            stage: (h.buckets, list(h.bucket_counts), h.count, h.sum)
+            for stage, h in _histograms.items()
+        }
+        in_flight = dict(_in_flight)
+        errors = dict(_errors)
+
+    lines = [
+        "# HELP flight_stage_duration_seconds Latency of each stage of the route analysis.",
+        "# TYPE flight_stage_duration_seconds histogram",
+    ]
+    for stage, (buckets, bucket_counts, count, total) in sorted(histograms.items()):
+        cumulative = 0
+        for upper, n in zip(buckets, bucket_counts):
+            cumulative += n
+            lines.append(
+                f"flight_stage_duration_seconds_bucket{_labels(stage=stage, le=repr(upper))} {cumulative}"
+            )
+        lines.append(f"flight_stage_duration_seconds_bucket{_labels(stage=stage, le='+Inf')} {count}")
+        lines.append(f"flight_stage_duration_seconds_sum{_labels(stage=stage)} {total!r}")
+        lines.append(f"flight_stage_duration_seconds_count{_labels(stage=stage)} {count}")
+
+    lines += [
+        "# HELP flight_stage_errors_total Stage runs that raised an exception.",
+        "# TYPE flight_stage_errors_total counter",
+    ]
+    for stage in sorted(histograms):
+        lines.append(f"flight_stage_errors_total{_labels(stage=stage)} {errors.get(stage, 0)}")
+
+    lines += [
+        "# HELP flight_stage_in_flight Stage runs currently in progress.",
+        "# TYPE flight_stage_in_flight gauge",
+    ]
+    for stage, n in sorted(in_flight.items()):
+        lines.append(f"flight_stage_in_flight{_labels(stage=stage)} {n}")
+
+    return lines
+
+
+# {cache name: {hits, misses, size, maxsize, hit_rate}} for every cache in the worker
+def _cache_stats() -> dict[str, dict]:
+    from .data.airport_routes import AIRPORT_CACHE
+    from .data.database import ROUTE_CACHE
+    from .data.metadata import _BOUNDS_CACHE
+    from .data.network_graph import ab_graph_png_data_url, ab_graph_svg_data_url
+    from .data.weather import METAR_CACHE
+
+    caches = {
+        "route_stats": ROUTE_CACHE.stats(),
+        "airport_routes": AIRPORT_CACHE.stats(),
+        "date_bounds": _BOUNDS_CACHE.stats(),
+        "metar": METAR_CACHE.stats(),
+    }
+    for name, func in (
+        ("graph_svg", ab_graph_svg_data_url),
+        ("graph_png", ab_graph_png_data_url),
+    ):
+        info = func.cache_info()
+        lookups = info.hits + info.misses
+        caches[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "maxsize": info.maxsize,
+            "hit_rate": (info.hits / lookups) if lookups else 0.0,
+        }
+    return caches
+
+
+def _cache_lines() -> list[str]:
+    caches = _cache_stats()
+    lines = []
+    for metric, key, kind, help_text in (
+        ("flight_cache_hits_total", "hits", "counter", "Cache lookups answered from memory."),
+        ("flight_cache_misses_total", "misses", "counter", "Cache lookups that had to compute / fetch."),
+        ("flight_cache_size", "size", "gauge", "Entries currently cached."),
+        ("flight_cache_hit_ratio", "hit_rate", "gauge", "Hits / lookups since the worker started."),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        for name, stats in sorted(caches.items()):
+            lines.append(f"{metric}{_labels(cache=name)} {stats[key]}")
+
+    # prefix sum index over the rollup (data/route_index.py), 0 when it isn't loaded
+    from .data import route_index
+
+    index = route_index._index
+    lines += [
+        "# HELP flight_route_index_bytes Memory held by the route prefix sum index.",
+        "# TYPE flight_route_index_bytes gauge",
+        f"flight_route_index_bytes {index.nbytes() if index is not None else 0}",
+        "# HELP flight_route_index_routes Routes in the route prefix sum index.",
+        "# TYPE flight_route_index_routes gauge",
+        f"flight_route_index_routes {len(index.route_ids) if index is not None else 0}",
+    ]
+
+    # METAR cache specifics (stale-while-revalidate + coalescing, see data/weather.py)
+    metar = caches["metar"]
+    for metric, key, help_text in (
+        ("flight_metar_stale_hits_total", "stale_hits", "Stale METARs served while a refresh ran."),
+        ("flight_metar_coalesced_total", "coalesced", "Lookups that waited on a fetch already in flight."),
+        ("flight_metar_fetches_total", "fetches", "Batched requests sent to aviationweather.gov."),
+        ("flight_metar_fetch_errors_total", "errors", "Batched requests that failed."),
+    ):
+        lines += [
+            f"# HELP {metric} {help_text}",
+            f"# TYPE {metric} counter",
+            f"{metric} {metar[key]}",
+        ]
+    return lines
+
+
+# the whole /metrics page
+def render_metrics() -> str:
+    return "\n".join(_stage_lines() + _cache_lines()) + "\n"
@@ -1,84 +1,109 @@
 import reflex as rx
-import duckdb as ddb
-from pathlib import Path
-import httpx
 
 
-from .data.network_graph import ab_graph_png_data_url  # the network graph func
+from .data.network_graph import route_graph_data_url  # the network graph func (svg or png)
+from .data.connection import get_db  # per worker duckdb connection (views + prepared statements)
+from .data.metadata import dataset_range_label
+from .data.weather import (
+    METAR_CACHE,  # cached, pooled async METAR client
+    WeatherUnavailableError,
+)
 from .data.database import (
-    percent_calc,
-    route_query_scheduled,  # used for network graph
-    on_time_count,
-    cancelled_count,
-    delayed_count,
-    diverted_count,
+    route_trend,  # per month route counts in one grouped query (trend chart)
+    trend_totals,  # -> the pie chart numbers from that same query
+    route_delays,  # arrival delay percentiles + histogram (merged per month histograms)
+    route_carriers,  # the same counts per airline in one grouped query
     ICAO_conversion,
+    UnknownAirportError,
 )
+from .data.leaderboard import leaderboard  # precomputed top routes per horizon
+from .data.airport_routes import airport_routes  # every route of one airport, one grouped query
+from .data.airport_search import suggest_airports  # ranked autocomplete from the in-memory index
 
 
 from .data.airport_list import AIRPORT_CODE_SET
+from .executor import run_blocking  # bounded thread pool for the blocking work in analyze
+from .metrics import timed  # per stage latency histograms for /metrics
 
 
 class RouteState(rx.State):
-    source_airport: str = ""
+    source_airport: str = ""  # the airport code analyze uses, "" until the input holds a known code
     dest_airport: str = ""
+    source_query: str = ""  # what is typed in the inputs (a code, an ICAO id or part of a name)
+    dest_query: str = ""
+    source_suggestions: list[dict] = []  # [{"code", "label"}] best matches first (data/airport_search.py)
+    dest_suggestions: list[dict] = []
     months_back: int = 3
 
     pie_data: list[dict] = []  # the pie data
+    trend_data: list[dict] = []  # per month counts for the trend chart
+    delay_data: list[dict] = []  # flights per arrival delay bucket
+    delay_percentiles: str = ""  # e.g. "Median ~3 min · 90th ~41 min · 99th ~152 min"
+    carrier_data: list[dict] = []  # counts per airline for the carrier breakdown chart
+    chart_mode: str = "pie"  # "pie" (whole horizon), "trend" (month by month), "delays" or "carriers"
     network_graph_weight: int = 0  # the initial weight of the edge in the network graph
     show_pie_flag: bool = False  # flag to wait on pie
+    dataset_range: str = ""  # e.g. "Jan 2018 - Jun 2025", what the MAX horizon covers
 
-    # similar to how we bringing in self.network_graph_weight variable we gotta do it for the other 2 elements in the
-    # network graph -> source airport and destination airport so that we can use them in the graph generation function
-    @rx.var
-    def network_graph_src(self) -> str:
-        return ab_graph_png_data_url(
-            self.network_graph_weight, self.source_airport, self.dest_airport
-        )
+    # the network graph image (data url). rendered on the thread pool by analyze once the weight is known
+    # instead of being a computed var that re-renders whenever the airport inputs change
+    network_graph_src: str = ""
 
     # event to make the chart un-render on page reload
     # we can keep adding new charts to turn off here on reload
     @rx.event
     def on_page_load(self):
-        self.show_pie_flag = False
-        # more charts to un-render
-        self.pie_data = []
+        _clear_route_charts(self)
+        _hide_airport(self)
 
+        # footer statistics only (cached per dataset version) so this is cheap on every load
+        if get_db().flights_files:
+            self.dataset_range = dataset_range_label(get_db())
+
+    # both charts come from the same analyze click so switching is instant
     @rx.event
-    def show_pie_chart_func(self):
-        self.show_pie_flag = True
+    def set_chart_mode(self, mode: str | list[str]):
+        self.chart_mode = mode if isinstance(mode, str) else mode[0]
 
     @rx.event
     def set_months_back(self, months: int):
-        self.months_back = max(1, int(months))
+        self.months_back = max(0, int(months))  # 0 -> MAX
 
     # this method isn't an event so don't use the event decorator
     # removes whitespaces and make input upper case only
     def _norm_code(self, value: str) -> str:
-        v = (value or "").upper().strip()
-        return v[:3]
+        return (value or "").upper().strip()
+
+    # what was typed -> (the airport code if it already is a known one, suggestions from the search index)
+    # the inputs are debounced (components/cards.py) so this runs once per pause in typing
+    def _lookup(self, value: str) -> tuple[str, list[dict]]:
+        code = self._norm_code(value)
+        if code in AIRPORT_CODE_SET:
+            return code, []
+        return "", [
+            {"code": s["code"], "label": s["label"]} for s in suggest_airports(value)
+        ]
 
     @rx.event
-    def set_source_airport(self, value: str):
-        v = self._norm_code(value)
-        self.source_airport = v
+    def set_source_query(self, value: str):
+        self.source_query = value
+        self.source_airport, self.source_suggestions = self._lookup(value)
 
-        if len(v) == 3 and v not in AIRPORT_CODE_SET:
-            # self.source_airport = ""
-            yield rx.toast.error("Unknown origin airport code. Pick one from the list.")
-            return
+    @rx.event
+    def set_dest_query(self, value: str):
+        self.dest_query = value
+        self.dest_airport, self.dest_suggestions = self._lookup(value)
 
+    # clicking a suggestion fills the input with its code
     @rx.event
-    def set_dest_airport(self, value: str):
-        v = self._norm_code(value)
-        self.dest_airport = v
-
-        if len(v) == 3 and v not in AIRPORT_CODE_SET:
-            # self.dest_airport = ""
-            yield rx.toast.error(
-                "Unknown destination airport code. Pick one from the list."
-            )
-            return
+    def pick_source(self, code: str):
+        self.source_airport = self.source_query = code
+        self.source_suggestions = []
+
+    @rx.event
+    def pick_dest(self, code: str):
+        self.dest_airport = self.dest_query = code
+        self.dest_suggestions = []
 
     source_fltCat = ""
     dest_fltCat = ""
@@ -89,30 +114,22 @@ class RouteState(rx.State):
 
     # METAR get current weather data -> put here due to circular import issue
 
-    def current_weather_status(self) -> tuple[str, str]:
+    # both stations through the shared METAR cache (one request for whatever isn't cached, see data/weather.py)
+    # a station without a current report comes back as "" -> "Unknown category." in the tooltip
+    @staticmethod
+    @timed("weather")
+    async def current_weather_status(
+        source_airport: str, dest_airport: str
+    ) -> tuple[str, str]:
 
-        src_icao = ICAO_conversion(ddb, self.source_airport)
-        dst_icao = ICAO_conversion(ddb, self.dest_airport)
+        src_icao = ICAO_conversion(source_airport)
+        dst_icao = ICAO_conversion(dest_airport)
 
-        origin_resp = httpx.get(
-            "https://aviationweather.gov/api/data/metar",
-            params={"ids": src_icao, "format": "json"},
-            headers={"User-Agent": "wx-test"},
-            timeout=5,
-        )
-        dest_resp = httpx.get(
-            "https://aviationweather.gov/api/data/metar",
-            params={"ids": dst_icao, "format": "json"},
-            headers={"User-Agent": "wx-test"},
-            timeout=5,
-        )
-
-        origin_status = origin_resp.json()
-        dest_status = dest_resp.json()
+        metars = await METAR_CACHE.get_many([src_icao, dst_icao])
 
         return (
-            (origin_status[0]["fltCat"]),
-            (dest_status[0]["fltCat"]),
+            (metars.get(src_icao) or {}).get("fltCat", ""),
+            (metars.get(dst_icao) or {}).get("fltCat", ""),
         )
 
     # function to convert colors and explanation
@@ -170,130 +187,90 @@ class RouteState(rx.State):
             self.dest_weather_explanation = "Unknown category."
             self.dest_card_color = "gray"
 
-    @rx.event
-    def analyze(self):
+    # background event -> doesn't hold the state lock (or the event loop) while the queries run
+    # the blocking work goes to the thread pool and each stage pushes its own state update as soon as it's done
+    # (pie chart first, then the network graph, then the weather)
+    # every stage is timed (see metrics.py), "analyze" is the whole click
+    @rx.event(background=True)
+    @timed("analyze")
+    async def analyze(self):
+
+        async with self:
+            source_airport = self.source_airport
+            dest_airport = self.dest_airport
+            months_back = self.months_back
+            # typed something that isn't a known code yet (a name, a partial code)
+            unresolved = (self.source_query.strip() and not source_airport) or (
+                self.dest_query.strip() and not dest_airport
+            )
+
+        if unresolved:
+            yield rx.toast.error("Pick the airports from the suggestions (or type their codes).")
+            return
 
-        if not self.source_airport or not self.dest_airport:
+        # origin only -> airport mode (every route out of / into that airport, see load_airport_page)
+        if source_airport and not dest_airport:
+            if source_airport not in AIRPORT_CODE_SET:
+                yield rx.toast.error("Please select a valid airport code from the list.")
+                return
+            async with self:
+                _clear_route_charts(self)
+                self.airport = source_airport
+                self.airport_months = max(0, int(months_back))
+                self.airport_page = 1
+            yield RouteState.load_airport_page
+            return
+
+        if not source_airport or not dest_airport:
             yield rx.toast.warning(
                 "Enter both origin and destination before analyzing."
             )
             return
 
-        if (self.source_airport not in AIRPORT_CODE_SET) or (
-            self.dest_airport not in AIRPORT_CODE_SET
+        if (source_airport not in AIRPORT_CODE_SET) or (
+            dest_airport not in AIRPORT_CODE_SET
         ):
             yield rx.toast.error("Please select valid airport codes from the list.")
             return
 
-            # defensive checks (when both origin = destination)
-        if (
-            (self.source_airport in AIRPORT_CODE_SET)
-            and (self.dest_airport in AIRPORT_CODE_SET)
-            and (self.source_airport == self.dest_airport)
-        ):
+        # defensive checks (when both origin = destination)
+        if source_airport == dest_airport:
             yield rx.toast.error("Origin and destination cannot be the same.")
             return
 
         # bring in the data from user input we just checking user input in console log
 
-        yield rx.console_log(self.source_airport)
+        yield rx.console_log(source_airport)
 
-        yield rx.console_log(self.dest_airport)
+        yield rx.console_log(dest_airport)
 
-        yield rx.console_log(str(self.months_back))
+        yield rx.console_log(str(months_back))
 
         yield rx.toast.success("Generating Graphs")
 
-        # pi chart data starting here
-
-        # paths
-        cloud_path = Path("/var/data/combinedv2.parquet")
-        local_path = Path("/home/sai/Downloads/combinedv2.parquet")
-        path = ""
-        if local_path.exists() == True:
-            path = str(local_path)
-        elif cloud_path.exists() == True:
-            path = str(cloud_path)
-        else:
-            print("Please set the correct path for your parquet dataset")
-
-        # computing this outside so we can reuse it
-        on_time_count_var = on_time_count(
-            ddb=ddb,
-            parquet_path=path,  # for local path use this "/home/sai/Downloads/combinedv2.parquet"
-            month_count=str(
-                self.months_back
-            ),  # for cloud path use "/var/data/combinedv2.parquet"
-            source_airport=self.source_airport,  # prefer absolute paths for ease of use when hardcoding
-            dest_airport=self.dest_airport,
-        )
+        # and the other way around, the airport table goes away
+        async with self:
+            _hide_airport(self)
 
-        cancelled_count_var = cancelled_count(
-            ddb=ddb,
-            parquet_path=path,  # for local path use this "/home/sai/Downloads/combinedv2.parquet"
-            month_count=str(
-                self.months_back
-            ),  # for cloud path use "/var/data/combinedv2.parquet"
-            source_airport=self.source_airport,  # prefer absolute paths for ease of use when hardcoding
-            dest_airport=self.dest_airport,
-        )
+        # pi chart data starting here
 
-        delayed_count_var = delayed_count(
-            ddb=ddb,
-            parquet_path=path,  # for local path use this "/home/sai/Downloads/combinedv2.parquet"
-            month_count=str(
-                self.months_back
-            ),  # for cloud path use "/var/data/combinedv2.parquet"
-            source_airport=self.source_airport,  # prefer absolute paths for ease of use when hardcoding
-            dest_airport=self.dest_airport,
+        # one grouped query for all 5 counts per month (trend chart), the pie is just its totals
+        # the dataset path is resolved once by the connection manager (see data/connection.py)
+        trend = await run_blocking(
+            route_trend, get_db(), str(months_back), source_airport, dest_airport
         )
+        stats = trend_totals(trend)
 
-        diverted_count_var = diverted_count(
-            ddb=ddb,
-            parquet_path=path,  # for local path use this "/home/sai/Downloads/combinedv2.parquet"
-            month_count=str(
-                self.months_back
-            ),  # for cloud path use "/var/data/combinedv2.parquet"
-            source_airport=self.source_airport,  # prefer absolute paths for ease of use when hardcoding
-            dest_airport=self.dest_airport,
-        )
-
-        # putting this in the network graph
-        self.network_graph_weight = route_query_scheduled(
-            ddb=ddb,
-            parquet_path=path,  # for local path use this "/home/sai/Downloads/combinedv2.parquet"
-            month_count=str(
-                self.months_back
-            ),  # for cloud path use "/var/data/combinedv2.parquet"
-            source_airport=self.source_airport,  # prefer absolute paths for ease of use when hardcoding
-            dest_airport=self.dest_airport,
-        )
+        on_time_count_var = stats["on_time"]
+        delayed_count_var = stats["delayed"]
+        cancelled_count_var = stats["cancelled"]
+        diverted_count_var = stats["diverted"]
 
         # percent count to insert into legend or pi chart itself
-        # self.network_graph_weight is the total scheduled number flight
-
-        on_time_count_per = 0
-        delayed_count_per = 0
-        cancelled_count_per = 0
-        diverted_count_per = 0
-
-        (
-            on_time_count_per,
-            delayed_count_per,
-            cancelled_count_per,
-            diverted_count_per,
-        ) = percent_calc(
-            self.network_graph_weight,
-            on_time_count_var,
-            delayed_count_var,
-            cancelled_count_var,
-            diverted_count_var,
-        )
-
-        on_time_count_per = round(on_time_count_per, 1)
-        delayed_count_per = round(delayed_count_per, 1)
-        cancelled_count_per = round(cancelled_count_per, 1)
-        diverted_count_per = round(diverted_count_per, 1)
+        on_time_count_per = round(stats["on_time_per"], 1)
+        delayed_count_per = round(stats["delayed_per"], 1)
+        cancelled_count_per = round(stats["cancelled_per"], 1)
+        diverted_count_per = round(stats["diverted_per"], 1)
 
         # literally the worst way to do this
         # but if a value is zero we can make it none so it wont render
@@ -309,34 +286,282 @@ class RouteState(rx.State):
         if diverted_count_var == 0:
             diverted_count_var = None
 
-        # here we are rendering the pie chart
-        self.pie_data = [
-            {
-                "name": f"On Time/Schedule Flights {on_time_count_per}%",
-                "value": on_time_count_var,
-                "fill": "#9B5DE5",
-            },
-            {
-                "name": f"Delayed {delayed_count_per}%",
-                "value": delayed_count_var,
-                "fill": "#F15BB5",
-            },
-            {
-                "name": f"Cancelled {cancelled_count_per}%",
-                "value": cancelled_count_var,
-                "fill": "#FEE440",
-            },
-            {
-                "name": f"Diverted {diverted_count_per}%",
-                "value": diverted_count_var,
-                "fill": "#00BBF9",
-            },
-        ]
+        async with self:
+            # putting this in the network graph
+            # self.network_graph_weight is the total scheduled number flight
+            self.network_graph_weight = stats["scheduled"]
+
+            # here we are rendering the pie chart
+            self.pie_data = [
+                {
+                    "name": f"On Time/Schedule Flights {on_time_count_per}%",
+                    "value": on_time_count_var,
+                    "fill": "#9B5DE5",
+                },
+                {
+                    "name": f"Delayed {delayed_count_per}%",
+                    "value": delayed_count_var,
+                    "fill": "#F15BB5",
+                },
+                {
+                    "name": f"Cancelled {cancelled_count_per}%",
+                    "value": cancelled_count_var,
+                    "fill": "#FEE440",
+                },
+                {
+                    "name": f"Diverted {diverted_count_per}%",
+                    "value": diverted_count_var,
+                    "fill": "#00BBF9",
+                },
+            ]
+            self.trend_data = trend
+            self.show_pie_flag = True
+
+        # arrival delay distribution (per month histograms merged, see data/delay_hist.py)
+        delays = await run_blocking(
+            route_delays, get_db(), str(months_back), source_airport, dest_airport
+        )
+        async with self:
+            self.delay_data = delays["buckets"]
+            self.delay_percentiles = _percentile_label(delays)
+
+        # per airline counts (one grouped query, cached with the route results)
+        carriers = await run_blocking(
+            route_carriers, get_db(), str(months_back), source_airport, dest_airport
+        )
+        async with self:
+            self.carrier_data = carriers
 
-        yield self.show_pie_chart_func()
+        # svg by default (microseconds), the matplotlib png is memoized by (weight, source, destination)
+        graph_src = await run_blocking(
+            route_graph_data_url, stats["scheduled"], source_airport, dest_airport
+        )
+        async with self:
+            self.network_graph_src = graph_src
 
-        self.source_fltCat, self.dest_fltCat = self.current_weather_status()
+        # weather is the last thing that gets populated (async, one round trip for both airports)
+        try:
+            source_fltCat, dest_fltCat = await self.current_weather_status(
+                source_airport, dest_airport
+            )
+        except UnknownAirportError:
+            # airport is in our list but not in iata-icao.parquet -> no METAR station to ask
+            source_fltCat, dest_fltCat = "N/A", "N/A"
+            yield rx.toast.warning("No weather station found for one of these airports.")
+        except WeatherUnavailableError:
+            source_fltCat, dest_fltCat = "N/A", "N/A"
+            yield rx.toast.warning("Couldn't reach the weather service, try again later.")
+
+        async with self:
+            self.source_fltCat, self.dest_fltCat = source_fltCat, dest_fltCat
+            self.get_popup_explanation_and_color()
+
+
+    # nationwide leaderboard card: top routes by on time / delay / cancel / divert rate for one horizon preset
+    # the rankings are precomputed once per dataset version (data/leaderboard.py) so switching tabs is just a lookup
+    # kept in RouteState rather than a state class of its own, every rx.State subclass costs ~7 ms at import
+    leaderboard_months: int = 12
+    leaderboard_metric: str = "on_time"
+    leaderboard_order: str = "highest"
+
+    leaderboard_rows: list[dict] = []  # {rank, route, scheduled, rate} for the table
+    leaderboard_min_flights: int = 0  # volume threshold of the current horizon
+    leaderboard_ranked_routes: int = 0  # how many routes made that threshold
+    leaderboard_loading: bool = False
 
-        self.get_popup_explanation_and_color()
+    @rx.event
+    def set_leaderboard_months(self, months: int):
+        self.leaderboard_months = max(0, int(months))
+        return RouteState.load_leaderboard
 
-        ### TO DO: MAKE WEATHER FETCH -> ASYNC I JUST PUT A 5s TIMEOUT + its the last thing that gets populated
+    @rx.event
+    def set_leaderboard_metric(self, metric: str):
+        self.leaderboard_metric = metric
+        return RouteState.load_leaderboard
+
+    @rx.event
+    def set_leaderboard_order(self, order: str):
+        self.leaderboard_order = order
+        return RouteState.load_leaderboard
+
+    # background so the first build for a new dataset (one grouped scan) doesn't hold the state lock
+    @rx.event(background=True)
+    async def load_leaderboard(self):
+        async with self:
+            options = _leaderboard_options(self)
+            self.leaderboard_loading = True
+        months, metric, order = options
+
+        if not get_db().flights_files:
+            async with self:
+                self.leaderboard_loading = False
+            return
+
+        # this runs on every page load, so whatever goes wrong the spinner has to stop
+        try:
+            board = await run_blocking(leaderboard, get_db(), months, metric, order)
+            async with self:
+                if _leaderboard_options(self) != options:
+                    return  # options changed while this was loading, the newer load fills the table
+                self.leaderboard_rows = [
+                    {
+                        "rank": rank,
+                        "route": f"{route['origin']} → {route['dest']}",
+                        "scheduled": f"{route['scheduled']:,}",
+                        "rate": f"{route[metric + '_per']:.1f}%",
+                    }
+                    for rank, route in enumerate(board["routes"], start=1)
+                ]
+                self.leaderboard_min_flights = board["min_flights"]
+                self.leaderboard_ranked_routes = board["ranked_routes"]
+        except ValueError:
+            yield rx.toast.error("Unknown leaderboard option.")
+        except Exception as e:
+            print(f"leaderboard failed: {e!r}")
+            yield rx.toast.error("Couldn't load the leaderboard, try again later.")
+        finally:
+            async with self:
+                if _leaderboard_options(self) == options:
+                    self.leaderboard_loading = False
+
+    # airport mode: analyze with only an origin lists every route of that airport (data/airport_routes.py)
+    # sorting and paging are done server side, only one page of rows is ever held here
+    airport: str = ""  # "" -> card hidden
+    airport_months: int = 3
+    airport_direction: str = "outbound"  # "outbound" or "inbound"
+    airport_sort: str = "scheduled"
+    airport_descending: bool = True
+    airport_page: int = 1
+
+    airport_rows: list[dict] = []  # {route, scheduled, on_time, delayed, cancelled} for the table
+    airport_pages: int = 1
+    airport_total_routes: int = 0
+    airport_total_flights: str = ""
+    airport_loading: bool = False
+
+    @rx.event
+    def set_airport_direction(self, direction: str | list[str]):
+        self.airport_direction = direction if isinstance(direction, str) else direction[0]
+        self.airport_page = 1
+        return RouteState.load_airport_page
+
+    # clicking the sorted column again flips the order. airports sort A-Z first, numbers highest first
+    @rx.event
+    def set_airport_sort(self, sort: str):
+        if sort == self.airport_sort:
+            self.airport_descending = not self.airport_descending
+        else:
+            self.airport_sort = sort
+            self.airport_descending = sort != "partner"
+        self.airport_page = 1
+        return RouteState.load_airport_page
+
+    @rx.event
+    def next_airport_page(self):
+        if self.airport_page < self.airport_pages:
+            self.airport_page += 1
+            return RouteState.load_airport_page
+
+    @rx.event
+    def prev_airport_page(self):
+        if self.airport_page > 1:
+            self.airport_page -= 1
+            return RouteState.load_airport_page
+
+    # background so the first (uncached) grouped query for a big hub doesn't hold the state lock
+    @rx.event(background=True)
+    async def load_airport_page(self):
+        async with self:
+            request = _airport_request(self)
+            self.airport_loading = True
+
+        airport, months, direction, sort, descending, page = request
+        if not airport or not get_db().flights_files:
+            async with self:
+                self.airport_loading = False
+            return
+
+        try:
+            result = await run_blocking(
+                airport_routes, get_db(), airport, str(months), direction, sort, descending, page
+            )
+            async with self:
+                if _airport_request(self) != request:
+                    return  # options changed while this was loading, the newer load fills the table
+                self.airport_rows = [
+                    {
+                        "route": f"{route['origin']} → {route['dest']}",
+                        "scheduled": f"{route['scheduled']:,}",
+                        "on_time": f"{route['on_time_per']:.1f}%",
+                        "delayed": f"{route['delayed_per']:.1f}%",
+                        "cancelled": f"{route['cancelled_per']:.1f}%",
+                    }
+                    for route in result["routes"]
+                ]
+                self.airport_page = result["page"]
+                self.airport_pages = result["pages"]
+                self.airport_total_routes = result["total_routes"]
+                self.airport_total_flights = f"{result['total_flights']:,}"
+                # the page may have been clamped to the last one
+                request = _airport_request(self)
+        except Exception as e:
+            print(f"airport routes failed for {airport}: {e!r}")
+            yield rx.toast.error("Couldn't load the routes of this airport, try again later.")
+        finally:
+            async with self:
+                if _airport_request(self) == request:
+                    self.airport_loading = False
+
+
+# "Median ~3 min · 90th ~41 min · 99th ~152 min" (~ because they're read off the histograms)
+def _percentile_label(delays: dict) -> str:
+    if not delays["available"]:
+        return "Delay histograms aren't built for this dataset."
+    if not delays["flights"]:
+        return "No arrivals in this horizon."
+    return " · ".join(
+        f"{name} ~{delays[key]:.0f} min"
+        for name, key in (("Median", "p50"), ("90th", "p90"), ("99th", "p99"))
+    )
+
+
+# the helpers below take the state instead of being methods: reflex re-reads a state's type hints for every
+# underscore name in its class body (~1 ms each at import)
+
+
+# un-renders the route cards (charts, network graph, current weather) -> page reload, or analyze switching to
+# airport mode so the last route's charts don't stay up above the airport table
+def _clear_route_charts(state: RouteState):
+    state.show_pie_flag = False
+    # more charts to un-render
+    state.pie_data = []
+    state.trend_data = []
+    state.delay_data = []
+    state.delay_percentiles = ""
+    state.carrier_data = []
+    state.network_graph_src = ""
+
+
+# closes airport mode -> page reload or a route analyze
+# a load still in flight sees the request changed and leaves the table alone
+def _hide_airport(state: RouteState):
+    state.airport = ""
+    state.airport_rows = []
+    state.airport_loading = False
+
+
+# what load_airport_page is loading, to tell whether a newer load replaced it
+def _airport_request(state: RouteState) -> tuple:
+    return (
+        state.airport,
+        state.airport_months,
+        state.airport_direction,
+        state.airport_sort,
+        state.airport_descending,
+        state.airport_page,
+    )
+
+
+# the options load_leaderboard is loading, to tell whether a newer load replaced it
+def _leaderboard_options(state: RouteState) -> tuple:
+    return (state.leaderboard_months, state.leaderboard_metric, state.leaderboard_order)
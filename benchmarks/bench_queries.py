@@ -0,0 +1,363 @@
+# timings for the query layer on a synthetic dataset (synthetic_dataset.py), so performance can be tracked
+# without the private combinedv2.parquet
+#   - route query (uncached _route_stats) and the per carrier breakdown (uncached _route_carriers) for every horizon
+#     in HORIZON_PRESETS, on each layout:
+#     raw single file, route x month rollup (rollup.py), the prefix sum index over it (route_index.py)
+#     and the year/month partitioned copy (relayout.py), plain and with dictionary encoded airports
+#   - route_stats answered from ROUTE_CACHE, ICAO_conversion and percent_calc
+#   - ab_graph_png_data_url (cold = lru cache cleared, warm) and the svg renderer for comparison
+#   - end-to-end analyze through reflex's state manager for every horizon (METAR requests answered locally)
+# everything is written into a scratch directory, results are printed as a table or as json (--json / --out)
+#
+# usage:
+#   python benchmarks/bench_queries.py --rows 2000000
+#   python benchmarks/bench_queries.py --data /tmp/synthetic.parquet --json --out bench.json
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_ROWS = 1_000_000
+DEFAULT_REPEAT = 20
+
+# (label, how many flights the route should have): busiest route, a typical one, a rarely flown one
+ROUTE_PICKS = [("busy", 0.0), ("median", 0.5), ("rare", 0.95)]
+
+
+# {n, min_ms, median_ms, p95_ms, mean_ms} for a list of durations in seconds
+def summarize(samples: list[float]) -> dict:
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "n": len(ms),
+        "min_ms": round(ms[0], 4),
+        "median_ms": round(statistics.median(ms), 4),
+        "p95_ms": round(ms[min(len(ms) - 1, int(round(0.95 * (len(ms) - 1))))], 4),
+        "mean_ms": round(statistics.fmean(ms), 4),
+    }
+
+
+# size on disk of a partitioned copy
+def directory_mb(path: str) -> float:
+    total = sum(
+        os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names
+    )
+    return round(total / 1e6, 2)
+
+
+def time_calls(func, repeat: int, setup=None) -> dict:
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - t)
+    return summarize(samples)
+
+
+# for functions that take microseconds: time batches of `number` calls, report per call
+def time_fast(func, repeat: int, number: int = 10_000) -> dict:
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - t) / number)
+    return summarize(samples)
+
+
+def pick_routes(ddb, icao_table) -> list[tuple[str, str, str]]:
+    rows = (
+        ddb.cursor()
+        .execute(
+            "SELECT ORIGIN, DEST FROM flights GROUP BY ALL ORDER BY count(*) DESC, ORIGIN, DEST"
+        )
+        .fetchall()
+    )
+    # only routes with a METAR station on both ends so analyze goes down its normal path
+    rows = [(o, d) for o, d in rows if o in icao_table and d in icao_table]
+    return [(label, *rows[int(q * (len(rows) - 1))]) for label, q in ROUTE_PICKS]
+
+
+def bench_route_queries(results, layout, ddb, routes, horizons, repeat):
+    from Flight_Analytics_App.data.database import _route_carriers, _route_stats
+
+    for label, src, dst in routes:
+        for horizon_label, months in horizons:
+            for name, func in (
+                ("route_stats_uncached", _route_stats),
+                ("route_carriers_uncached", _route_carriers),
+            ):
+                func(ddb, str(months), src, dst)  # prepare the statement on this cursor first
+                timing = time_calls(lambda: func(ddb, str(months), src, dst), repeat)
+                results.append(
+                    {
+                        "name": name,
+                        "layout": layout,
+                        "route": f"{src}-{dst}",
+                        "route_kind": label,
+                        "horizon": horizon_label,
+                        **timing,
+                    }
+                )
+
+
+def bench_helpers(results, ddb, routes, repeat):
+    from Flight_Analytics_App.data.database import (
+        ICAO_conversion,
+        ROUTE_CACHE,
+        percent_calc,
+        route_stats,
+    )
+    from Flight_Analytics_App.data.network_graph import (
+        ab_graph_png_data_url,
+        ab_graph_svg_data_url,
+    )
+
+    _, src, dst = routes[0]
+    stats = route_stats(ddb, "3", src, dst)
+    weight = stats["scheduled"]
+
+    ROUTE_CACHE.clear()
+    route_stats(ddb, "3", src, dst)
+    results.append(
+        {"name": "route_stats_cached", "route": f"{src}-{dst}", **time_fast(lambda: route_stats(ddb, "3", src, dst), repeat, 1000)}
+    )
+    results.append(
+        {"name": "percent_calc", **time_fast(lambda: percent_calc(weight, 7, 2, 1, 0), repeat)}
+    )
+    results.append(
+        {"name": "ICAO_conversion", **time_fast(lambda: ICAO_conversion(src), repeat)}
+    )
+
+    # the first png pulls in matplotlib + networkx, keep that out of the numbers
+    ab_graph_png_data_url(weight, src, dst)
+    png_repeat = max(3, repeat // 4)  # ~0.1 s per render
+    results.append(
+        {
+            "name": "ab_graph_png_data_url_cold",
+            **time_calls(lambda: ab_graph_png_data_url(weight, src, dst), png_repeat, ab_graph_png_data_url.cache_clear),
+        }
+    )
+    results.append(
+        {"name": "ab_graph_png_data_url_warm", **time_fast(lambda: ab_graph_png_data_url(weight, src, dst), repeat, 1000)}
+    )
+    results.append(
+        {
+            "name": "ab_graph_svg_data_url_cold",
+            **time_calls(lambda: ab_graph_svg_data_url(weight, src, dst), repeat, ab_graph_svg_data_url.cache_clear),
+        }
+    )
+
+
+# local stand-in for aviationweather.gov so the end-to-end numbers don't depend on the network
+async def _local_metars(icao_ids):
+    return {icao: {"icaoId": icao, "fltCat": "VFR"} for icao in icao_ids}
+
+
+async def _analyze_once(app, token, src, dst, months):
+    from reflex.state import State
+
+    from Flight_Analytics_App.state import RouteState
+
+    root_key = f"{token}_{State.get_full_name()}"
+    async with app.state_manager.modify_state(root_key) as root:
+        state = await root.get_state(RouteState)
+        state.source_airport, state.dest_airport, state.months_back = src, dst, months
+
+    root = await app.state_manager.get_state(root_key)
+    state = await root.get_state(RouteState)
+    handler = RouteState.event_handlers["analyze"]
+
+    t = time.perf_counter()
+    async for _ in state._process_event(handler=handler, state=state, payload={}):
+        pass
+    return time.perf_counter() - t
+
+
+def bench_analyze(results, routes, horizons, repeat):
+    from Flight_Analytics_App.Flight_Analytics_App import app
+    from Flight_Analytics_App.data.database import ROUTE_CACHE
+    from Flight_Analytics_App.data.network_graph import ab_graph_svg_data_url
+    from Flight_Analytics_App.data.weather import METAR_CACHE
+
+    METAR_CACHE.fetcher = _local_metars
+
+    async def run():
+        for label, src, dst in routes:
+            for horizon_label, months in horizons:
+                await _analyze_once(app, "bench", src, dst, months)  # prepare + warm the weather cache
+
+                cold, warm = [], []
+                for _ in range(repeat):
+                    # cold = nothing about this route cached (the METAR cache stays warm, it is per station)
+                    ROUTE_CACHE.clear()
+                    ab_graph_svg_data_url.cache_clear()
+                    cold.append(await _analyze_once(app, "bench", src, dst, months))
+                    warm.append(await _analyze_once(app, "bench", src, dst, months))
+
+                for name, samples in (("analyze_cold", cold), ("analyze_warm", warm)):
+                    results.append(
+                        {
+                            "name": name,
+                            "route": f"{src}-{dst}",
+                            "route_kind": label,
+                            "horizon": horizon_label,
+                            **summarize(samples),
+                        }
+                    )
+
+    asyncio.run(run())
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the route query layer on synthetic data")
+    parser.add_argument("--data", help="existing flights parquet (default: generate one with --rows)")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="rows to generate")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="samples per measurement")
+    parser.add_argument("--workdir", help="scratch directory (default: a temp dir that gets removed)")
+    parser.add_argument("--skip-partitioned", action="store_true", help="don't build/time the partitioned layout")
+    parser.add_argument("--skip-analyze", action="store_true", help="don't run the end-to-end analyze")
+    parser.add_argument("--json", action="store_true", help="print the results as json")
+    parser.add_argument("--out", help="also write the json results to this file")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="flight-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    parquet = os.path.join(workdir, "flights.parquet")
+
+    # the app resolves the dataset from here and the rollup gets written next to it (inside workdir)
+    os.environ["FLIGHT_DATASET_PATH"] = parquet
+    os.environ.pop("FLIGHT_PARTITIONED_PATH", None)
+    os.environ.setdefault("ROUTE_GRAPH_RENDERER", "svg")
+
+    import duckdb
+
+    from synthetic_dataset import generate
+
+    from Flight_Analytics_App.data import route_index
+    from Flight_Analytics_App.data.airport_list import AIRPORT_ICAO
+    from Flight_Analytics_App.data.connection import FlightDB
+    from Flight_Analytics_App.data.database import carrier_rollup_path, rollup_path
+    from Flight_Analytics_App.data.metadata import HORIZON_PRESETS
+    from Flight_Analytics_App.data.relayout import relayout
+    from Flight_Analytics_App.data.rollup import build_carrier_rollup, build_rollup
+
+    horizons = [(label, months) for months, label in HORIZON_PRESETS]
+
+    try:
+        for path in (parquet, rollup_path(parquet), carrier_rollup_path(parquet)):
+            if os.path.lexists(path):
+                os.remove(path)
+        if args.data:
+            os.symlink(os.path.abspath(args.data), parquet)
+        else:
+            t = time.perf_counter()
+            generate(parquet, args.rows)
+            print(f"generated {args.rows} rows in {time.perf_counter() - t:.1f}s", file=sys.stderr)
+
+        results = []
+        store_mb = {}
+
+        # raw single file (opened before the rollup exists so it can't pick it up)
+        raw = FlightDB(parquet)
+        rows = raw.cursor().execute("SELECT count(*) FROM flights").fetchone()[0]
+        routes = pick_routes(raw, AIRPORT_ICAO)
+        bench_route_queries(results, "raw", raw, routes, horizons, args.repeat)
+        raw.close()
+
+        con = duckdb.connect()
+        build_rollup(con, parquet)
+        build_carrier_rollup(con, parquet)
+        if not args.skip_partitioned:
+            partitioned_dir = os.path.join(workdir, "partitioned")
+            encoded_dir = os.path.join(workdir, "encoded")
+            for directory in (partitioned_dir, encoded_dir):
+                shutil.rmtree(directory, ignore_errors=True)
+            relayout(con, parquet, partitioned_dir)
+            relayout(con, parquet, encoded_dir, encode_airports=True)
+        con.close()
+
+        rollup = FlightDB(parquet)
+        route_index.ROUTE_INDEX_ENABLED = False  # the rollup query itself
+        bench_route_queries(results, "rollup", rollup, routes, horizons, args.repeat)
+        route_index.ROUTE_INDEX_ENABLED = True
+        if route_index.load_route_index(rollup) is not None:
+            bench_route_queries(results, "route_index", rollup, routes, horizons, args.repeat)
+        bench_helpers(results, rollup, routes, args.repeat)
+        rollup.close()
+
+        if not args.skip_partitioned:
+            # no parquet_path -> no rollup, only the partitions
+            partitioned = FlightDB("", partitioned_dir=partitioned_dir)
+            bench_route_queries(results, "partitioned", partitioned, routes, horizons, args.repeat)
+            partitioned.close()
+
+            encoded = FlightDB("", partitioned_dir=encoded_dir)
+            bench_route_queries(results, "encoded", encoded, routes, horizons, args.repeat)
+            encoded.close()
+            store_mb = {"partitioned": directory_mb(partitioned_dir), "encoded": directory_mb(encoded_dir)}
+
+        if not args.skip_analyze:
+            bench_analyze(results, routes, horizons, args.repeat)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    output = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "duckdb": duckdb.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "rows": rows,
+            "data": os.path.abspath(args.data) if args.data else "synthetic",
+            "repeat": args.repeat,
+            "routes": [{"kind": k, "route": f"{s}-{d}"} for k, s, d in routes],
+            "store_mb": store_mb,
+        },
+        "results": results,
+    }
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(output, f, indent=2)
+
+    if args.json:
+        print(json.dumps(output, indent=2))
+        return
+
+    print(f"{'benchmark':<28} {'layout':<12} {'route':<8} {'horizon':<8} {'median ms':>10} {'p95 ms':>10} {'min ms':>10}")
+    for r in results:
+        print(
+            f"{r['name']:<28} {r.get('layout', ''):<12} {r.get('route_kind', ''):<8} {r.get('horizon', ''):<8} "
+            f"{r['median_ms']:>10.4f} {r['p95_ms']:>10.4f} {r['min_ms']:>10.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
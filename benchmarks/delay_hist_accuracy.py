@@ -0,0 +1,308 @@
+# accuracy of the arrival delay percentiles read off the per month histograms (data/delay_hist.py)
+# against DuckDB's exact quantile_cont, on a synthetic dataset (synthetic_dataset.py) or any flights parquet
+#   - a spread of routes (busiest to rarely flown) for every horizon in HORIZON_PRESETS
+#   - every p50 / p90 / p99 is checked against the bound documented in delay_hist.py: exact when the order
+#     statistics it interpolates between are in 1 minute bins, otherwise within the width of their bins.
+#     values outside the binned range are clamped and only counted
+#   - bucket counts have to match exactly
+#   - histogram file size and the time of one merged lookup vs the exact query
+# exits with status 1 when any bound is broken
+#
+# usage:
+#   python benchmarks/delay_hist_accuracy.py --rows 2000000
+#   python benchmarks/delay_hist_accuracy.py --data /tmp/synthetic.parquet --routes 500 --json
+
+import argparse
+import bisect
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_queries import summarize  # noqa: E402
+
+DEFAULT_ROWS = 1_000_000
+DEFAULT_ROUTES = 200
+
+# exact percentiles + the sorted delays (for the error bound) of the sampled routes over one horizon
+EXACT_SQL = """
+WITH pairs AS (
+  SELECT unnest(CAST($origins AS VARCHAR[])) AS ORIGIN, unnest(CAST($dests AS VARCHAR[])) AS DEST
+)
+SELECT ORIGIN, DEST, quantile_cont(ARR_DELAY, $quantiles), list(ARR_DELAY ORDER BY ARR_DELAY)
+FROM flights
+SEMI JOIN pairs USING (ORIGIN, DEST)
+WHERE flight_date BETWEEN CAST($start AS DATE) AND CAST($end AS DATE)
+  AND ARR_DELAY IS NOT NULL
+GROUP BY ORIGIN, DEST
+"""
+
+# the exact percentiles of one route, what a lookup would cost without the histograms
+EXACT_ROUTE_SQL = """
+SELECT quantile_cont(ARR_DELAY, $quantiles)
+FROM flights
+WHERE flight_date BETWEEN CAST($start AS DATE) AND CAST($end AS DATE)
+  AND ORIGIN = $origin
+  AND DEST = $dest
+  AND ARR_DELAY IS NOT NULL
+"""
+
+
+# bin of one delay, same bins as DELAY_BIN_SQL
+def delay_bin(value: float) -> int:
+    from Flight_Analytics_App.data.delay_hist import DELAY_BIN_EDGES
+
+    if value < DELAY_BIN_EDGES[1]:
+        return 0
+    return bisect.bisect_right(DELAY_BIN_EDGES, value) - 1
+
+
+# error allowed for a histogram estimate of `value` (None = outside the binned range, clamped)
+def allowed_error(value: float):
+    from Flight_Analytics_App.data.delay_hist import DELAY_BIN_EDGES
+
+    b = delay_bin(value)
+    if b == 0 or b == len(DELAY_BIN_EDGES) - 1:
+        return None
+    width = DELAY_BIN_EDGES[b + 1] - DELAY_BIN_EDGES[b]
+    # 1 minute bins hold whole minutes only -> exact (for whole-minute data)
+    return 1e-9 if width == 1 and value == int(value) else width
+
+
+# `count` routes spread evenly over the ranking by volume (busiest first)
+def pick_routes(ddb, count: int) -> list[tuple[str, str]]:
+    rows = (
+        ddb.cursor()
+        .execute(
+            "SELECT ORIGIN, DEST FROM flights WHERE ARR_DELAY IS NOT NULL "
+            "GROUP BY ALL ORDER BY count(*) DESC, ORIGIN, DEST"
+        )
+        .fetchall()
+    )
+    if len(rows) <= count:
+        return rows
+    return [rows[round(i * (len(rows) - 1) / (count - 1))] for i in range(count)]
+
+
+def check(ddb, routes, horizons) -> tuple[dict, list[dict]]:
+    from Flight_Analytics_App.data.database import _route_delays
+    from Flight_Analytics_App.data.delay_hist import (
+        DELAY_BIN_EDGES,
+        DELAY_PERCENTILES,
+        histogram_buckets,
+    )
+    from Flight_Analytics_App.data.metadata import horizon_window
+
+    keys = [f"p{round(q * 100)}" for q in DELAY_PERCENTILES]
+    stats = {
+        key: {"checked": 0, "clamped": 0, "violations": 0, "max_abs_error": 0.0, "sum_abs_error": 0.0}
+        for key in keys
+    }
+    failures = []
+    bucket_mismatches = 0
+
+    for label, months in horizons:
+        start, end = horizon_window(ddb, str(months))
+        rows = (
+            ddb.cursor()
+            .execute(
+                EXACT_SQL,
+                {
+                    "origins": [o for o, _ in routes],
+                    "dests": [d for _, d in routes],
+                    "quantiles": list(DELAY_PERCENTILES),
+                    "start": start,
+                    "end": end,
+                },
+            )
+            .fetchall()
+        )
+        for origin, dest, exact, delays in rows:
+            approx = _route_delays(ddb, str(months), origin, dest)
+            if approx["flights"] != len(delays):
+                failures.append({"route": f"{origin}-{dest}", "horizon": label, "error": "flight count differs"})
+                continue
+
+            # same bucketing of the exact delays
+            histogram = [0] * len(DELAY_BIN_EDGES)
+            for value in delays:
+                histogram[delay_bin(value)] += 1
+            if histogram_buckets(histogram) != approx["buckets"]:
+                bucket_mismatches += 1
+
+            for q, key, exact_value in zip(DELAY_PERCENTILES, keys, exact):
+                position = q * (len(delays) - 1)
+                lo, hi = delays[math.floor(position)], delays[math.ceil(position)]
+                bounds = [allowed_error(lo), allowed_error(hi)]
+                error = abs(approx[key] - exact_value)
+                s = stats[key]
+                if None in bounds:
+                    s["clamped"] += 1
+                    continue
+                s["checked"] += 1
+                s["sum_abs_error"] += error
+                s["max_abs_error"] = max(s["max_abs_error"], error)
+                if error > max(bounds) + 1e-9:
+                    s["violations"] += 1
+                    failures.append(
+                        {
+                            "route": f"{origin}-{dest}",
+                            "horizon": label,
+                            "percentile": key,
+                            "exact": exact_value,
+                            "histogram": approx[key],
+                            "allowed": max(bounds),
+                        }
+                    )
+
+    summary = {
+        key: {
+            "checked": s["checked"],
+            "clamped": s["clamped"],
+            "violations": s["violations"],
+            "max_abs_error": round(s["max_abs_error"], 4),
+            "mean_abs_error": round(s["sum_abs_error"] / s["checked"], 4) if s["checked"] else 0.0,
+        }
+        for key, s in stats.items()
+    }
+    summary["bucket_mismatches"] = bucket_mismatches
+    return summary, failures
+
+
+def time_lookups(ddb, routes, months, repeat) -> dict:
+    from Flight_Analytics_App.data.database import _route_delays
+
+    samples = []
+    for origin, dest in routes[:repeat]:
+        t = time.perf_counter()
+        _route_delays(ddb, str(months), origin, dest)
+        samples.append(time.perf_counter() - t)
+    return summarize(samples)
+
+
+def time_exact_lookups(ddb, routes, months, repeat) -> dict:
+    from Flight_Analytics_App.data.delay_hist import DELAY_PERCENTILES
+    from Flight_Analytics_App.data.metadata import horizon_window
+
+    start, end = horizon_window(ddb, str(months))
+    cur = ddb.cursor()
+    samples = []
+    for origin, dest in routes[:repeat]:
+        params = {
+            "quantiles": list(DELAY_PERCENTILES),
+            "start": start,
+            "end": end,
+            "origin": origin,
+            "dest": dest,
+        }
+        t = time.perf_counter()
+        cur.execute(EXACT_ROUTE_SQL, params).fetchone()
+        samples.append(time.perf_counter() - t)
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check delay histogram percentiles against exact quantile_cont")
+    parser.add_argument("--data", help="existing flights parquet (default: generate one with --rows)")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="rows to generate")
+    parser.add_argument("--routes", type=int, default=DEFAULT_ROUTES, help="routes to check per horizon")
+    parser.add_argument("--workdir", help="scratch directory (default: a temp dir that gets removed)")
+    parser.add_argument("--json", action="store_true", help="print the results as json")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="flight-delay-hist-")
+    os.makedirs(workdir, exist_ok=True)
+    parquet = os.path.join(workdir, "flights.parquet")
+
+    import duckdb
+
+    from synthetic_dataset import generate
+
+    from Flight_Analytics_App.data.connection import FlightDB
+    from Flight_Analytics_App.data.delay_hist import build_delay_hist, delay_hist_path
+    from Flight_Analytics_App.data.metadata import HORIZON_PRESETS
+
+    horizons = [(label, months) for months, label in HORIZON_PRESETS]
+
+    try:
+        for path in (parquet, delay_hist_path(parquet)):
+            if os.path.lexists(path):
+                os.remove(path)
+        if args.data:
+            os.symlink(os.path.abspath(args.data), parquet)
+        else:
+            generate(parquet, args.rows)
+
+        # exact side first, before the histograms exist
+        exact_db = FlightDB(parquet)
+        routes = pick_routes(exact_db, args.routes)
+        exact_timing = time_exact_lookups(exact_db, routes, 12, min(len(routes), 50))
+
+        con = duckdb.connect()
+        t = time.perf_counter()
+        hist_rows = build_delay_hist(con, parquet)
+        build_seconds = time.perf_counter() - t
+        con.close()
+
+        ddb = FlightDB(parquet)
+        assert ddb.has_delay_hist
+        summary, failures = check(ddb, routes, horizons)
+        hist_timing = time_lookups(ddb, routes, 12, min(len(routes), 50))
+
+        output = {
+            "rows": ddb.cursor().execute("SELECT count(*) FROM flights").fetchone()[0],
+            "routes": len(routes),
+            "horizons": [label for label, _ in horizons],
+            "histogram_rows": hist_rows,
+            "histogram_mb": round(os.path.getsize(delay_hist_path(parquet)) / 1e6, 2),
+            "dataset_mb": round(os.path.getsize(os.path.realpath(parquet)) / 1e6, 2),
+            "build_seconds": round(build_seconds, 2),
+            "lookup_12m_exact_query": exact_timing,
+            "lookup_12m_histogram": hist_timing,
+            "accuracy": summary,
+            "failures": failures[:20],
+        }
+        exact_db.close()
+        ddb.close()
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(output, indent=2))
+    else:
+        print(
+            f"{output['rows']} flights, {output['routes']} routes x {len(horizons)} horizons, "
+            f"{hist_rows} histograms ({output['histogram_mb']} MB, built in {output['build_seconds']}s)"
+        )
+        print(
+            f"12M lookup median: exact query {exact_timing['median_ms']:.3f} ms, "
+            f"histograms {hist_timing['median_ms']:.3f} ms"
+        )
+        print(f"{'percentile':<11} {'checked':>8} {'clamped':>8} {'violations':>11} {'max err':>9} {'mean err':>9}")
+        for key, s in summary.items():
+            if key == "bucket_mismatches":
+                continue
+            print(
+                f"{key:<11} {s['checked']:>8} {s['clamped']:>8} {s['violations']:>11} "
+                f"{s['max_abs_error']:>9.3f} {s['mean_abs_error']:>9.3f}"
+            )
+        print(f"bucket mismatches: {summary['bucket_mismatches']}")
+        for failure in failures[:20]:
+            print("FAIL", failure)
+
+    violated = any(
+        s["violations"] for key, s in summary.items() if key != "bucket_mismatches"
+    ) or summary["bucket_mismatches"] or failures
+    sys.exit(1 if violated else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# cold start budget for the app package
+# imports the app in a fresh interpreter with -X importtime, reports what every module of ours costs and
+# fails (exit code 1) when
+#   - our own modules take longer than --budget-ms to import (self time, reflex's own import cost not counted)
+#   - one of the heavy dependencies that should only load on first use got imported at startup
+#
+# usage:
+#   python benchmarks/import_time.py
+#   python benchmarks/import_time.py --budget-ms 80 --json
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PACKAGE = "Flight_Analytics_App"
+ENTRY_MODULE = "Flight_Analytics_App.Flight_Analytics_App"
+
+# loaded lazily (first query / first png / first weather fetch), never at import time
+LAZY_MODULES = ["duckdb", "matplotlib", "networkx", "httpx", "numpy"]
+
+DEFAULT_BUDGET_MS = 100.0
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# runs the import in a new interpreter -> (rows, modules that ended up loaded)
+# rows are (module, self_us, cumulative_us, depth) in import order
+# the garbage collector is off for the import: a full collection (~55 ms over the ~120k objects reflex, sqlalchemy
+# and pydantic leave behind) runs wherever the allocation count happens to cross the threshold, inside redis for
+# one tree and inside our state module for the next, so with it on the number says more about where that
+# collection landed than about what our modules cost
+def measure(entry_module=ENTRY_MODULE):
+    code = (
+        "import gc, sys, json;"
+        "gc.disable();"
+        f"import {entry_module};"
+        f"print(json.dumps(sorted(m for m in {LAZY_MODULES!r} if m in sys.modules)))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+
+    loaded = json.loads(proc.stdout.strip().splitlines()[-1])
+    return rows, loaded
+
+
+def report(rows, loaded, budget_ms):
+    ours = [r for r in rows if r[0] == PACKAGE or r[0].startswith(PACKAGE + ".")]
+    own_ms = sum(r[1] for r in ours) / 1000
+    total_ms = sum(r[1] for r in rows) / 1000
+
+    return {
+        "total_import_ms": round(total_ms, 1),
+        "package_self_ms": round(own_ms, 1),
+        "budget_ms": budget_ms,
+        "lazy_modules_loaded": loaded,
+        "modules": [
+            {"module": name, "self_ms": round(s / 1000, 2), "cumulative_ms": round(c / 1000, 2)}
+            for name, s, c, _ in sorted(ours, key=lambda r: r[1], reverse=True)
+        ],
+        "slowest_overall": [
+            {"module": name, "self_ms": round(s / 1000, 2)}
+            for name, s, _, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:15]
+        ],
+        "ok": own_ms <= budget_ms and not loaded,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time budget for the app package")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=float(os.environ.get("IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS)),
+        help=f"max self import time of {PACKAGE}.* in ms (default: {DEFAULT_BUDGET_MS})",
+    )
+    parser.add_argument("--json", action="store_true", help="print the result as json")
+    args = parser.parse_args()
+
+    rows, loaded = measure()
+    result = report(rows, loaded, args.budget_ms)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{'module':<55} {'self ms':>9} {'cumul ms':>9}")
+        for m in result["modules"]:
+            print(f"{m['module']:<55} {m['self_ms']:>9.2f} {m['cumulative_ms']:>9.2f}")
+        print()
+        print("slowest modules overall (self time):")
+        for m in result["slowest_overall"]:
+            print(f"  {m['module']:<53} {m['self_ms']:>9.2f}")
+        print()
+        print(f"total import time      {result['total_import_ms']:.1f} ms")
+        print(f"{PACKAGE} self time {result['package_self_ms']:.1f} ms (budget {args.budget_ms:.1f} ms)")
+        if loaded:
+            print(f"heavy modules imported at startup: {', '.join(loaded)}")
+        print("OK" if result["ok"] else "FAIL")
+
+    sys.exit(0 if result["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
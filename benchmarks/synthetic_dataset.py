@@ -0,0 +1,139 @@
+# writes a synthetic BTS-style flights parquet so the query layer can be benchmarked without the private
+# combinedv2.parquet. same columns the app queries:
+#   flight_date DATE, ORIGIN VARCHAR, DEST VARCHAR, CANCELLED DOUBLE, DIVERTED DOUBLE, ARR_DELAY DOUBLE,
+#   OP_UNIQUE_CARRIER VARCHAR
+# airports come from AIRPORT_CODES with zipf-like popularity so a handful of hubs carry most of the traffic,
+# carriers are drawn per flight by CARRIER_SHARES,
+# roughly 2% of flights are cancelled, 0.25% diverted and ~20% arrive 15+ minutes late
+# --seed picks which airports are the hubs (row level randomness comes from duckdb's random())
+#
+# usage:
+#   python benchmarks/synthetic_dataset.py /tmp/synthetic.parquet --rows 5000000
+
+import argparse
+import os
+import sys
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Flight_Analytics_App.data.airport_list import AIRPORT_CODES  # noqa: E402
+from Flight_Analytics_App.data.sql import write_parquet  # noqa: E402
+
+DEFAULT_ROWS = 1_000_000
+DEFAULT_START = "2018-01-01"
+DEFAULT_END = "2025-06-30"
+
+# popularity of the i-th airport (after a seeded shuffle) ~ 1 / (i + 1) ** HUB_SKEW
+HUB_SKEW = 1.1
+
+# rough share of domestic flights per carrier (OP_UNIQUE_CARRIER)
+CARRIER_SHARES = [
+    ("WN", 0.19), ("DL", 0.15), ("AA", 0.15), ("OO", 0.11), ("UA", 0.11), ("YX", 0.05),
+    ("B6", 0.04), ("AS", 0.04), ("9E", 0.04), ("MQ", 0.04), ("NK", 0.04), ("OH", 0.03),
+    ("F9", 0.02), ("G4", 0.02), ("HA", 0.01),
+]  # fmt: skip
+
+
+def _airport_weights(seed: int) -> list[tuple[str, float]]:
+    import random
+
+    codes = list(AIRPORT_CODES)
+    random.Random(seed).shuffle(codes)
+    return [(code, 1 / (rank + 1) ** HUB_SKEW) for rank, code in enumerate(codes)]
+
+
+def generate(
+    out_path: str,
+    rows: int = DEFAULT_ROWS,
+    start: str = DEFAULT_START,
+    end: str = DEFAULT_END,
+    seed: int = 42,
+):
+    con = duckdb.connect()
+    con.execute("SELECT setseed(?)", [(seed % 1000) / 1000])
+
+    weights = _airport_weights(seed)
+    hub1, hub2 = weights[0][0], weights[1][0]
+
+    # airports with the running total of their weight -> sampling = ASOF join a uniform number onto it
+    con.execute("CREATE TEMP TABLE airport_weights (code VARCHAR, weight DOUBLE)")
+    con.executemany("INSERT INTO airport_weights VALUES (?, ?)", weights)
+    con.execute(
+        """
+        CREATE TEMP TABLE airports AS
+        SELECT code, sum(weight) OVER (ORDER BY weight DESC, code) / sum(weight) OVER () - weight / sum(weight) OVER () AS lo
+        FROM airport_weights
+        """
+    )
+
+    # same ASOF sampling for the carrier of every flight
+    con.execute("CREATE TEMP TABLE carrier_shares (code VARCHAR, share DOUBLE)")
+    con.executemany("INSERT INTO carrier_shares VALUES (?, ?)", CARRIER_SHARES)
+    con.execute(
+        """
+        CREATE TEMP TABLE carriers AS
+        SELECT code, sum(share) OVER (ORDER BY share DESC, code) / sum(share) OVER () - share / sum(share) OVER () AS lo
+        FROM carrier_shares
+        """
+    )
+
+    write_parquet(
+        con,
+        """
+          WITH draws AS (
+            SELECT
+              i,
+              CAST(?::DATE + CAST(floor(random() * (?::DATE - ?::DATE + 1)) AS INTEGER) AS DATE) AS flight_date,
+              random() AS u_origin,
+              random() AS u_dest,
+              random() AS u_status,
+              random() AS u_delay,
+              random() AS u_delay2,
+              random() AS u_carrier
+            FROM range(?) t(i)
+          ),
+          routed AS (
+            SELECT d.*, o.code AS ORIGIN, de.code AS DEST_RAW, c.code AS OP_UNIQUE_CARRIER
+            FROM draws d
+            ASOF JOIN airports o ON d.u_origin >= o.lo
+            ASOF JOIN airports de ON d.u_dest >= de.lo
+            ASOF JOIN carriers c ON d.u_carrier >= c.lo
+          )
+          SELECT
+            flight_date,
+            ORIGIN,
+            -- no self loops: fall back to the busiest other airport
+            CASE WHEN DEST_RAW <> ORIGIN THEN DEST_RAW
+                 WHEN ORIGIN = ? THEN ?
+                 ELSE ? END AS DEST,
+            CASE WHEN u_status < 0.02 THEN 1.0 ELSE 0.0 END::DOUBLE AS CANCELLED,
+            CASE WHEN u_status >= 0.02 AND u_status < 0.0225 THEN 1.0 ELSE 0.0 END::DOUBLE AS DIVERTED,
+            CASE
+              WHEN u_status < 0.0225 THEN NULL  -- cancelled / diverted flights have no arrival delay
+              WHEN u_delay < 0.8 THEN round(-8 + 16 * (u_delay2 - 0.5) * 2)  -- early or roughly on time
+              ELSE round(15 - 45 * ln(1 - u_delay2))  -- long exponential tail of late arrivals
+            END AS ARR_DELAY,
+            OP_UNIQUE_CARRIER
+          FROM routed
+          ORDER BY flight_date
+        """,
+        [start, end, start, rows, hub1, hub2, hub1],
+        out_path,
+    )
+    con.close()
+    return out_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic BTS-style flights parquet")
+    parser.add_argument("out_path", help="parquet file to write")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--start", default=DEFAULT_START, help="first flight_date")
+    parser.add_argument("--end", default=DEFAULT_END, help="last flight_date")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    generate(args.out_path, args.rows, args.start, args.end, args.seed)
+    print(f"wrote {args.rows} synthetic flights to {args.out_path}")